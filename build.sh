@@ -1 +1 @@
-python3 src/main.py "/static-site-generator/"
\ No newline at end of file
+python3 src/main.py "/static-site-generator/" "$@"
\ No newline at end of file
@@ -0,0 +1,166 @@
+import block_markdown
+import dependency_graph
+import htmlnode
+import inline_markdown
+import metadata
+import textnode
+from htmlnode import HTMLNode, LeafNode, ParentNode
+from manifest import hash_bytes
+import argparse
+import marshal
+import os
+import shutil
+import zlib
+
+# Bump when the cached entry layout changes, parser changes are picked up from the sources
+AST_CACHE_VERSION = 1
+AST_CACHE_SIZE = 256 * 1024 * 1024
+LEAF, PARENT = 0, 1
+
+
+def parser_version() -> str:
+    """
+    a hash of the modules that turn markdown into the cached entries: the parser, and the front
+    matter, title and references code of metadata, main and dependency_graph. Editing any of them
+    never serves entries they would no longer produce
+    """
+    digest = [str(AST_CACHE_VERSION)]
+    # main imports this module, it is read by path rather than imported
+    paths = [module.__file__ for module in (textnode, htmlnode, inline_markdown, block_markdown, metadata, dependency_graph)]
+    paths.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py"))
+    for path in paths:
+        with open(path, "rb") as file:
+            digest.append(hash_bytes(file.read()))
+    return hash_bytes(" ".join(digest).encode())
+
+PARSER_VERSION = parser_version()
+
+
+def encode_node(node: HTMLNode) -> tuple:
+    if isinstance(node, ParentNode):
+        return (PARENT, node.tag, tuple(encode_node(child) for child in node.children), node.props)
+    return (LEAF, node.tag, node.value, node.props)
+
+def decode_node(data: tuple) -> HTMLNode:
+    kind, tag, value, props = data
+    if kind == PARENT:
+        # Props are copied by marshal already, transforms may edit them in place
+        return ParentNode(tag, [decode_node(child) for child in value], props)
+    return LeafNode(tag, value, props)
+
+
+class AstCache():
+    """
+    parsed pages kept on disk between builds, so a page whose markdown didn't change is never
+    parsed again when only the template, base path or build options did. Entries are keyed by
+    the hash of the page's markdown and the parser version.
+
+    An entry holds the page's title, its references and its node tree before links are
+    rewritten, marshalled and zlib compressed into one file per page in path. Hits touch
+    their file, prune drops the least recently used files once the cache outgrows max_bytes.
+    """
+    def __init__(self, path: str, max_bytes: int = AST_CACHE_SIZE) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(markdown: str) -> str:
+        return hash_bytes(f"{PARSER_VERSION}\0{markdown}".encode())
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], key + ".ast")
+
+    def get(self, key: str) -> tuple[str, dict, HTMLNode]:
+        """
+        returns (title, references, node) or None
+        """
+        path = self.entry_path(key)
+        try:
+            with open(path, "rb") as file:
+                title, references, tree = marshal.loads(zlib.decompress(file.read()))
+        except (OSError, ValueError, EOFError, TypeError, zlib.error):
+            # Missing, truncated or from another python version, the page is just parsed again
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return title, references, decode_node(tree)
+
+    def put(self, key: str, title: str, references: dict, node: HTMLNode) -> None:
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(zlib.compress(marshal.dumps((title, references, encode_node(node)))))
+        os.replace(tmp_path, path)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def entries(self) -> list[tuple[float, int, str]]:
+        # (mtime, size, path) of every entry, oldest first
+        found = []
+        if os.path.exists(self.path):
+            for root, dirs, files in os.walk(self.path):
+                for file_item in files:
+                    if file_item.endswith(".ast"):
+                        path = os.path.join(root, file_item)
+                        stat = os.stat(path)
+                        found.append((stat.st_mtime, stat.st_size, path))
+        return sorted(found)
+
+    def prune(self) -> int:
+        """
+        removes the least recently used entries until the cache fits in max_bytes and returns
+        how many were removed
+        """
+        entries = self.entries()
+        total = sum(size for mtime, size, path in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.unlink(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clean(self) -> None:
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path)
+
+
+def ast_cache_summary(stats: dict[str, int]) -> str:
+    lookups = stats["hits"] + stats["misses"]
+    rate = stats["hits"] / lookups * 100 if lookups else 0.0
+    return f"AST cache: {stats['hits']} hits, {stats['misses']} misses ({rate:.1f}% hit rate)"
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Inspect, shrink or empty the parsed page cache of main.py --ast-cache.")
+    parser.add_argument("--cache-dir", default="./.build/ast", help="the cache directory")
+    parser.add_argument("--max-size", type=int, default=AST_CACHE_SIZE // (1024 * 1024), metavar="MB", help="size prune shrinks the cache to (default: 256)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="print the number and total size of cached pages")
+    commands.add_parser("prune", help="remove the least recently used pages until the cache fits in --max-size")
+    commands.add_parser("clean", help="remove every cached page")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] = None) -> None:
+    args = parse_args(argv)
+    cache = AstCache(args.cache_dir, args.max_size * 1024 * 1024)
+    if args.command == "clean":
+        cache.clean()
+        print(f"Removed {args.cache_dir}")
+    elif args.command == "prune":
+        print(f"Removed {cache.prune()} cached page(s)")
+    else:
+        entries = cache.entries()
+        print(f"{len(entries)} cached page(s), {sum(size for mtime, size, path in entries) / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
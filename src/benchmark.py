@@ -0,0 +1,302 @@
+from block_markdown import markdown_to_blocks, block_to_block_type, classify_block, markdown_to_html_node, BlockType
+from inline_markdown import text_to_textnodes
+from template import Template
+import inline_markdown
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+BLOCK_MIX = {
+    "paragraph": 6,
+    "heading": 2,
+    "code": 1,
+    "quote": 1,
+    "unordered_list": 1,
+    "ordered_list": 1,
+}
+
+WORDS = (
+    "the elves of rivendell sang of old days while the river ran loud below the house "
+    "a hobbit walked the long road east with nothing but a pack and a cloak against the rain"
+).split()
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+
+def parse_block_mix(text: str) -> dict[str, int]:
+    """
+    parses "paragraph=6,code=1" into a block mix, unlisted block types are left out
+    """
+    mix = {}
+    for item in text.split(","):
+        name, weight = item.split("=")
+        if name not in BLOCK_MIX:
+            raise ValueError(f"unknown block type: {name}")
+        mix[name] = int(weight)
+    return mix
+
+
+class CorpusGenerator():
+    """
+    writes a synthetic content/ tree. The same settings and seed always give the same corpus.
+
+    pages - number of markdown files\n
+    blocks - number of blocks per page (the title heading comes on top)\n
+    block_mix - relative weight of each block type\n
+    inline_density - chance (0-1) that a word gets inline markup (bold, italic, code, link, image)\n
+    depth - how many directory levels pages are spread over
+    """
+    def __init__(self, pages: int = 200, blocks: int = 20, block_mix: dict[str, int] = None, inline_density: float = 0.1, depth: int = 2, seed: int = 0) -> None:
+        self.pages = pages
+        self.blocks = blocks
+        self.block_mix = block_mix or BLOCK_MIX
+        self.inline_density = inline_density
+        self.depth = depth
+        self.random = random.Random(seed)
+
+    def word(self) -> str:
+        word = self.random.choice(WORDS)
+        if self.random.random() >= self.inline_density:
+            return word
+        markup = self.random.randrange(5)
+        if markup == 0:
+            return f"**{word}**"
+        if markup == 1:
+            return f"_{word}_"
+        if markup == 2:
+            return f"`{word}`"
+        if markup == 3:
+            return f"[{word}](/blog/{word})"
+        return f"![{word}](/images/{word}.png)"
+
+    def sentence(self, length: int = 12) -> str:
+        return " ".join(self.word() for _ in range(self.random.randint(length // 2, length)))
+
+    def block(self) -> str:
+        kind = self.random.choices(list(self.block_mix), weights=list(self.block_mix.values()))[0]
+        lines = self.random.randint(1, 6)
+        if kind == "heading":
+            return "#" * self.random.randint(2, 6) + " " + self.sentence(6)
+        if kind == "code":
+            return "```\n" + "\n".join("    " + " ".join(self.random.choices(WORDS, k=6)) for _ in range(lines)) + "\n```"
+        if kind == "quote":
+            return "\n".join("> " + self.sentence() for _ in range(lines))
+        if kind == "unordered_list":
+            return "\n".join("- " + self.sentence() for _ in range(lines))
+        if kind == "ordered_list":
+            return "\n".join(f"{i + 1}. " + self.sentence() for i in range(lines))
+        return "\n".join(self.sentence() for _ in range(lines))
+
+    def page(self, number: int) -> str:
+        blocks = [f"# Page {number}"]
+        blocks.extend(self.block() for _ in range(self.blocks))
+        return "\n\n".join(blocks) + "\n"
+
+    def page_path(self, number: int) -> str:
+        parts = [f"section{(number // 10 ** (level + 1)) % 10}" for level in range(self.depth)]
+        return os.path.join(*parts, f"page{number}", "index.md")
+
+    def write(self, content_dir: str) -> list[str]:
+        paths = []
+        for number in range(self.pages):
+            path = os.path.join(content_dir, self.page_path(number))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as file:
+                file.write(self.page(number))
+            paths.append(path)
+        return paths
+
+
+def chain_block_to_block_type(markdown: str) -> BlockType:
+    """
+    the classifier before classify_block, kept as the reference for the classifier micro-benchmark:
+    every candidate type re-walks the lines, and the renderer split the block again afterwards
+    """
+    lines = markdown.split('\n')
+    if markdown.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
+        return BlockType.HEADING
+    if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
+        return BlockType.CODE
+    if markdown.startswith(">"):
+        for line in lines:
+            if not line.startswith(">"):
+                return BlockType.PARAGRAPH
+        return BlockType.QUOTE
+    if markdown.startswith("- "):
+        for line in lines:
+            if not line.startswith("- "):
+                return BlockType.PARAGRAPH
+        return BlockType.UNORDERED_LIST
+    if markdown.startswith("1. "):
+        i = 1
+        for line in lines:
+            if not line.startswith(f"{i}. "):
+                return BlockType.PARAGRAPH
+            i += 1
+        return BlockType.ORDERED_LIST
+    return BlockType.PARAGRAPH
+
+
+def inline_text(block: str, block_type: BlockType) -> list[str]:
+    """
+    the pieces of a block that the renderers hand to text_to_textnodes
+    """
+    lines = block.split("\n")
+    if block_type == BlockType.PARAGRAPH:
+        return [" ".join(lines)]
+    if block_type == BlockType.HEADING:
+        return [block.lstrip("#")[1:]]
+    if block_type == BlockType.QUOTE:
+        return [" ".join(line.lstrip(">").strip() for line in lines)]
+    if block_type == BlockType.UNORDERED_LIST:
+        return [line[2:] for line in lines]
+    if block_type == BlockType.ORDERED_LIST:
+        return [line[line.index(" ") + 1:] for line in lines]
+    return []
+
+
+def time_stage(function, repeat: int) -> dict:
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        runs.append(time.perf_counter() - start)
+    return {"min": min(runs), "median": statistics.median(runs), "runs": runs}
+
+
+def run_benchmark(content_dir: str, output_dir: str, repeat: int = 5) -> dict[str, dict]:
+    """
+    times each build stage on its own over every page in content_dir
+    """
+    documents = []
+    for root, dirs, files in os.walk(content_dir):
+        for name in sorted(files):
+            if name.endswith(".md"):
+                with open(os.path.join(root, name), "r") as file:
+                    documents.append((os.path.relpath(os.path.join(root, name), content_dir), file.read()))
+
+    # Inputs for every stage are prepared up front so each timing covers only that stage
+    blocks = [block for path, markdown in documents for block in markdown_to_blocks(markdown)]
+    texts = [text for block in blocks for text in inline_text(block, block_to_block_type(block))]
+    nodes = [markdown_to_html_node(markdown) for path, markdown in documents]
+    htmls = [node.to_html() for node in nodes]
+    template = Template(TEMPLATE)
+    pages = [template.render(Title=path, Content=html) for (path, markdown), html in zip(documents, htmls)]
+
+    def write_pages():
+        for (path, markdown), page in zip(documents, pages):
+            dest_path = os.path.join(output_dir, os.path.splitext(path)[0] + ".html")
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            with open(dest_path, "w") as file:
+                file.write(page)
+
+    stages = {
+        "markdown_to_blocks": lambda: [markdown_to_blocks(markdown) for path, markdown in documents],
+        "block_to_block_type": lambda: [block_to_block_type(block) for block in blocks],
+        "classify_chain": lambda: [(chain_block_to_block_type(block), block.split("\n")) for block in blocks],
+        "classify_block": lambda: [classify_block(block) for block in blocks],
+        "text_to_textnodes": lambda: [text_to_textnodes(text) for text in texts],
+        "markdown_to_html_node": lambda: [markdown_to_html_node(markdown) for path, markdown in documents],
+        "to_html": lambda: [node.to_html() for node in nodes],
+        "template": lambda: [template.render(Title=path, Content=html) for (path, markdown), html in zip(documents, htmls)],
+        "write": write_pages,
+    }
+    return {name: time_stage(function, repeat) for name, function in stages.items()}
+
+
+def git_commit() -> str:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def print_results(results: dict, baseline: dict = None) -> None:
+    print(f"{'stage':<24}{'min (ms)':>12}{'median (ms)':>14}" + (f"{'vs baseline':>14}" if baseline else ""))
+    for name, stage in results["stages"].items():
+        line = f"{name:<24}{stage['min'] * 1000:>12.2f}{stage['median'] * 1000:>14.2f}"
+        if baseline and name in baseline["stages"]:
+            line += f"{stage['min'] / baseline['stages'][name]['min']:>13.2f}x"
+        print(line)
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Time each build stage on a synthetic corpus.")
+    parser.add_argument("--pages", type=int, default=200, help="number of pages to generate")
+    parser.add_argument("--blocks", type=int, default=20, help="blocks per page")
+    parser.add_argument("--block-mix", type=parse_block_mix, default=None, help="block type weights, e.g. paragraph=6,code=1")
+    parser.add_argument("--inline-density", type=float, default=0.1, help="chance that a word carries inline markup")
+    parser.add_argument("--depth", type=int, default=2, help="directory nesting depth")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the corpus")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage")
+    parser.add_argument("--inline-tokenizer", choices=sorted(inline_markdown.INLINE_TOKENIZERS), default="split")
+    parser.add_argument("--content", default=None, help="benchmark an existing content directory instead of a generated one")
+    parser.add_argument("--json", default=None, help="write the results to this file")
+    parser.add_argument("--compare", default=None, help="results file from an earlier run to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] = None) -> dict:
+    args = parse_args(argv)
+    inline_markdown.set_inline_tokenizer(args.inline_tokenizer)
+
+    corpus = {
+        "pages": args.pages,
+        "blocks": args.blocks,
+        "block_mix": args.block_mix or BLOCK_MIX,
+        "inline_density": args.inline_density,
+        "depth": args.depth,
+        "seed": args.seed,
+    }
+    work_dir = tempfile.mkdtemp(prefix="ssg-bench-")
+    try:
+        content_dir = args.content
+        if content_dir is None:
+            content_dir = os.path.join(work_dir, "content")
+            CorpusGenerator(**corpus).write(content_dir)
+        else:
+            corpus = {"content": content_dir}
+        stages = run_benchmark(content_dir, os.path.join(work_dir, "docs"), args.repeat)
+    finally:
+        shutil.rmtree(work_dir)
+
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "inline_tokenizer": args.inline_tokenizer,
+        "corpus": corpus,
+        "stages": stages,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as file:
+            baseline = json.load(file)
+    print_results(results, baseline)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -13,31 +13,58 @@ class BlockType(Enum):
   UNORDERED_LIST = "unordered_list" 
   ORDERED_LIST = "ordered_list" 
 
-def block_to_block_type(markdown: str) -> BlockType:
-  lines = markdown.split('\n')
-  if markdown.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
-     return BlockType.HEADING
+def classify_heading(block: str, lines: list[str]) -> BlockType:
+  if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
+    return BlockType.HEADING
+  return BlockType.PARAGRAPH
+
+def classify_code(block: str, lines: list[str]) -> BlockType:
   if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
-     return BlockType.CODE
-  if markdown.startswith(">"):
-      for line in lines:
-          if not line.startswith(">"):
-              return BlockType.PARAGRAPH
-      return BlockType.QUOTE
-  if markdown.startswith("- "):
-      for line in lines:
-          if not line.startswith("- "):
-              return BlockType.PARAGRAPH
-      return BlockType.UNORDERED_LIST
-  if markdown.startswith("1. "):
-      i = 1
-      for line in lines:
-          if not line.startswith(f"{i}. "):
-              return BlockType.PARAGRAPH
-          i += 1
-      return BlockType.ORDERED_LIST
+    return BlockType.CODE
   return BlockType.PARAGRAPH
 
+def classify_quote(block: str, lines: list[str]) -> BlockType:
+  for line in lines:
+    if not line.startswith(">"):
+      return BlockType.PARAGRAPH
+  return BlockType.QUOTE
+
+def classify_unordered_list(block: str, lines: list[str]) -> BlockType:
+  for line in lines:
+    if not line.startswith("- "):
+      return BlockType.PARAGRAPH
+  return BlockType.UNORDERED_LIST
+
+def classify_ordered_list(block: str, lines: list[str]) -> BlockType:
+  i = 1
+  for line in lines:
+    if not line.startswith(f"{i}. "):
+      return BlockType.PARAGRAPH
+    i += 1
+  return BlockType.ORDERED_LIST
+
+# The first character of a block decides the only block type it can be besides a paragraph
+BLOCK_CLASSIFIERS = {
+  "#": classify_heading,
+  "`": classify_code,
+  ">": classify_quote,
+  "-": classify_unordered_list,
+  "1": classify_ordered_list,
+}
+
+def classify_block(block: str) -> tuple[BlockType, list[str]]:
+  """
+  returns the block type together with the block split into lines, so the renderer can reuse them
+  """
+  lines = block.split('\n')
+  classifier = BLOCK_CLASSIFIERS.get(block[:1])
+  if classifier is None:
+    return BlockType.PARAGRAPH, lines
+  return classifier(block, lines), lines
+
+def block_to_block_type(markdown: str) -> BlockType:
+  return classify_block(markdown)[0]
+
 
 def markdown_to_blocks(markdown: str) -> list[str]:
   blocks = markdown.split("\n\n")
@@ -49,6 +76,44 @@ def markdown_to_blocks(markdown: str) -> list[str]:
     filtered_blocks.append(block)
   return filtered_blocks
 
+def iter_markdown_blocks(lines):
+  """
+  yields the same blocks as markdown_to_blocks, but from an iterable of lines (e.g. an open file),
+  so only the block currently being read is kept in memory
+  """
+  current = []
+  ends_with_newline = False
+  for line in lines:
+    # A blank line right after a line break closes the block, same as splitting on "\n\n"
+    if ends_with_newline and line == "\n":
+      block = "".join(current)[:-1]
+      if block != "":
+        yield block.strip()
+      current = []
+      ends_with_newline = False
+      continue
+    current.append(line)
+    ends_with_newline = line.endswith("\n")
+  block = "".join(current)
+  if block != "":
+    yield block.strip()
+
+def stream_markdown_to_html(lines, out, transform=None, on_block=None) -> None:
+    """
+    writes the same html as markdown_to_html_node(markdown).to_html() into out, converting and
+    writing each block as soon as it has been read. transform, if given, is called on every
+    block node before it is written, and on_block on every block's markdown.
+    """
+    out.write("<div>")
+    for block in iter_markdown_blocks(lines):
+        if on_block is not None:
+            on_block(block)
+        html_node = block_to_html_node(block)
+        if transform is not None:
+            transform(html_node)
+        html_node.write_html(out)
+    out.write("</div>")
+
 def markdown_to_html_node(markdown):
     blocks = markdown_to_blocks(markdown)
     children = []
@@ -59,20 +124,8 @@ def markdown_to_html_node(markdown):
 
 
 def block_to_html_node(block):
-    block_type = block_to_block_type(block)
-    if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html_node(block)
-    if block_type == BlockType.HEADING:
-        return heading_to_html_node(block)
-    if block_type == BlockType.CODE:
-        return code_to_html_node(block)
-    if block_type == BlockType.ORDERED_LIST:
-        return olist_to_html_node(block)
-    if block_type == BlockType.UNORDERED_LIST:
-        return ulist_to_html_node(block)
-    if block_type == BlockType.QUOTE:
-        return quote_to_html_node(block)
-    raise ValueError("invalid block type")
+    block_type, lines = classify_block(block)
+    return BLOCK_RENDERERS[block_type](block, lines)
 
 
 def text_to_children(text):
@@ -84,14 +137,15 @@ def text_to_children(text):
     return children
 
 
-def paragraph_to_html_node(block):
-    lines = block.split("\n")
+def paragraph_to_html_node(block, lines=None):
+    if lines is None:
+        lines = block.split("\n")
     paragraph = " ".join(lines)
     children = text_to_children(paragraph)
     return ParentNode("p", children)
 
 
-def heading_to_html_node(block):
+def heading_to_html_node(block, lines=None):
     level = 0
     for char in block:
         if char == "#":
@@ -105,7 +159,7 @@ def heading_to_html_node(block):
     return ParentNode(f"h{level}", children)
 
 
-def code_to_html_node(block):
+def code_to_html_node(block, lines=None):
     if not block.startswith("```") or not block.endswith("```"):
         raise ValueError("invalid code block")
     text = block[4:-3]
@@ -115,8 +169,8 @@ def code_to_html_node(block):
     return ParentNode("pre", [code])
 
 
-def olist_to_html_node(block):
-    items = block.split("\n")
+def olist_to_html_node(block, lines=None):
+    items = lines if lines is not None else block.split("\n")
     html_items = []
     for item in items:
         text = item[3:]
@@ -125,8 +179,8 @@ def olist_to_html_node(block):
     return ParentNode("ol", html_items)
 
 
-def ulist_to_html_node(block):
-    items = block.split("\n")
+def ulist_to_html_node(block, lines=None):
+    items = lines if lines is not None else block.split("\n")
     html_items = []
     for item in items:
         text = item[2:]
@@ -135,8 +189,9 @@ def ulist_to_html_node(block):
     return ParentNode("ul", html_items)
 
 
-def quote_to_html_node(block):
-    lines = block.split("\n")
+def quote_to_html_node(block, lines=None):
+    if lines is None:
+        lines = block.split("\n")
     new_lines = []
     for line in lines:
         if not line.startswith(">"):
@@ -144,4 +199,15 @@ def quote_to_html_node(block):
         new_lines.append(line.lstrip(">").strip())
     content = " ".join(new_lines)
     children = text_to_children(content)
-    return ParentNode("blockquote", children)
\ No newline at end of file
+    return ParentNode("blockquote", children)
+
+
+# Renderers take the block and the lines classify_block already split it into
+BLOCK_RENDERERS = {
+    BlockType.PARAGRAPH: paragraph_to_html_node,
+    BlockType.HEADING: heading_to_html_node,
+    BlockType.CODE: code_to_html_node,
+    BlockType.ORDERED_LIST: olist_to_html_node,
+    BlockType.UNORDERED_LIST: ulist_to_html_node,
+    BlockType.QUOTE: quote_to_html_node,
+}
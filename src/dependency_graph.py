@@ -0,0 +1,176 @@
+from block_markdown import classify_block, BlockType
+from inline_markdown import extract_markdown_images, extract_markdown_links
+from manifest import write_json
+import argparse
+import json
+import os
+import posixpath
+import sys
+
+GRAPH_VERSION = 1
+
+
+def page_references(blocks) -> dict[str, list[str]]:
+    """
+    returns the urls a page's blocks link to and the images they show, as written in the
+    markdown. Code blocks are skipped, they render their brackets as text.
+    """
+    links = []
+    images = []
+    for block in blocks:
+        if "](" not in block or classify_block(block)[0] == BlockType.CODE:
+            continue
+        links.extend(url for text, url in extract_markdown_links(block))
+        images.extend(url for alt, url in extract_markdown_images(block))
+    return {"links": links, "images": images}
+
+
+def page_site_path(source: str, content_dir: str) -> str:
+    """
+    the url a page is served at: content/blog/tom/index.md is /blog/tom/, content/about.md is /about.html
+    """
+    rel_path = os.path.relpath(source, content_dir).replace(os.sep, "/")
+    directory, name = posixpath.split(rel_path)
+    if name == "index.md":
+        return "/" + (directory + "/" if directory else "")
+    return "/" + posixpath.splitext(rel_path)[0] + ".html"
+
+
+def site_path(url: str, page_path: str) -> str:
+    """
+    resolves a url found on the page served at page_path to a path on this site, or None for
+    urls pointing elsewhere (other sites, mailto:, plain #anchors)
+    """
+    url = url.strip().split("#")[0].split("?")[0]
+    if url == "" or url.startswith("//") or ":" in url.split("/")[0]:
+        return None
+    if not url.startswith("/"):
+        url = posixpath.join(posixpath.dirname(page_path), url)
+    path = posixpath.normpath(url)
+    # normpath drops the trailing slash that marks a directory index
+    if url.endswith("/") and path != "/":
+        path += "/"
+    return path
+
+
+def site_path_sources(path: str, content_dir: str, static_dir: str) -> list[str]:
+    """
+    the markdown sources or static files that could be served at a site path
+    """
+    rel_path = path.strip("/")
+    candidates = []
+    if path.endswith("/"):
+        candidates.append(os.path.join(content_dir, rel_path, "index.md"))
+    elif rel_path.endswith(".html"):
+        candidates.append(os.path.join(content_dir, rel_path[:-len(".html")] + ".md"))
+    else:
+        candidates.append(os.path.join(content_dir, rel_path, "index.md"))
+        candidates.append(os.path.join(content_dir, rel_path + ".md"))
+    if not path.endswith("/"):
+        candidates.append(os.path.join(static_dir, rel_path))
+    return [os.path.normpath(candidate) for candidate in candidates]
+
+
+class DependencyGraph():
+    """
+    records what every page was built from, so a change to a template or static file rebuilds
+    just the pages using it and broken links can be found without building anything.
+
+    pages - maps a markdown source path to a dict with the keys:\n
+    template - the template it was rendered with\n
+    links - site paths of the pages and files it links to\n
+    images - site paths of the images it shows
+    """
+    def __init__(self, path: str, pages: dict[str, dict] = None) -> None:
+        self.path = path
+        self.pages = pages if pages is not None else {}
+
+    @classmethod
+    def load(cls, path: str) -> "DependencyGraph":
+        # A missing or unreadable graph just means nothing is known about the last build
+        try:
+            with open(path, "r") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return cls(path)
+        if not isinstance(data, dict) or data.get("version") != GRAPH_VERSION:
+            return cls(path)
+        return cls(path, data.get("pages", {}))
+
+    def save(self) -> None:
+        write_json(self.path, {"version": GRAPH_VERSION, "pages": self.pages})
+
+    def record(self, source: str, template: str, page_path: str, references: dict[str, list[str]]) -> None:
+        def resolve(urls):
+            return sorted(set(path for path in (site_path(url, page_path) for url in urls) if path is not None))
+
+        self.pages[source] = {
+            "template": os.path.normpath(template),
+            "links": resolve(references["links"]),
+            "images": resolve(references["images"]),
+        }
+
+    def remove(self, source: str) -> dict:
+        return self.pages.pop(source, None)
+
+    def dependents(self, template: str = None, site_paths: set[str] = ()) -> list[str]:
+        """
+        the pages rendered with template, or linking to or showing any of site_paths
+        """
+        site_paths = set(site_paths)
+        if template is not None:
+            template = os.path.normpath(template)
+        found = []
+        for source, entry in self.pages.items():
+            if template is not None and entry["template"] == template:
+                found.append(source)
+            elif site_paths.intersection(entry["links"]) or site_paths.intersection(entry["images"]):
+                found.append(source)
+        return sorted(found)
+
+    def broken_links(self, content_dir: str, static_dir: str) -> list[tuple[str, str]]:
+        """
+        returns (source, site path) for every link or image with no page or static file behind it
+        """
+        broken = []
+        exists = {}
+        for source, entry in sorted(self.pages.items()):
+            for path in entry["links"] + entry["images"]:
+                if path not in exists:
+                    exists[path] = any(os.path.isfile(candidate) for candidate in site_path_sources(path, content_dir, static_dir))
+                if not exists[path]:
+                    broken.append((source, path))
+        return broken
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Query the dependency graph recorded by the last build.")
+    parser.add_argument("--graph", default="./.build/graph.json", help="dependency graph written by the build")
+    parser.add_argument("--content", default="./content", help="markdown source directory")
+    parser.add_argument("--static", default="./static", help="static asset directory")
+    parser.add_argument("--broken-links", action="store_true", help="list links and images that point at nothing, exits 1 if there are any")
+    parser.add_argument("--dependents", metavar="PATH", default=None, help="list the pages using a template, or linking to a site path such as /images/elf.png")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] = None) -> int:
+    args = parse_args(argv)
+    graph = DependencyGraph.load(args.graph)
+    if args.dependents:
+        if args.dependents.startswith("/"):
+            sources = graph.dependents(site_paths={args.dependents})
+        else:
+            sources = graph.dependents(template=args.dependents)
+        for source in sources:
+            print(source)
+    if args.broken_links:
+        broken = graph.broken_links(args.content, args.static)
+        for source, path in broken:
+            print(f"{source}: broken link to {path}")
+        if broken:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
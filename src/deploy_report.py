@@ -0,0 +1,85 @@
+from manifest import hash_file, write_json
+import os
+
+DEPLOY_REPORT_VERSION = 1
+
+
+class DeployReport():
+    """
+    collects the files a build writes to and removes from the output directory, so deploy and
+    CDN purge jobs can upload and invalidate just those. Nothing is walked or compared after
+    the fact, the steps writing outputs record them as they go.
+
+    added - maps each new output, relative to the output directory, to its sha256\n
+    modified - the same for outputs whose content changed\n
+    removed - outputs that were deleted\n
+    full - set for --full builds, which wipe the output directory first, so everything is added
+    and what was removed is unknown
+    """
+    def __init__(self, output_dir: str, full: bool = False) -> None:
+        self.output_dir = output_dir
+        self.full = full
+        self.added = {}
+        self.modified = {}
+        self.removed = set()
+
+    def relative(self, path: str) -> str:
+        # None for files outside the output directory, they aren't deployed
+        path = os.path.relpath(path, self.output_dir)
+        if path == ".." or path.startswith(".." + os.sep):
+            return None
+        return path.replace(os.sep, "/")
+
+    def record_write(self, path: str, existed: bool, digest: str = None) -> None:
+        """
+        records that path was written. digest is its sha256 if known, otherwise it is hashed when
+        the report is saved
+        """
+        path = self.relative(path)
+        if path is None:
+            return
+        if path in self.removed:
+            # Removed and written again in the same build, e.g. a page that moved between shards
+            self.removed.discard(path)
+            self.modified[path] = digest
+        elif path in self.added:
+            self.added[path] = digest
+        elif existed:
+            self.modified[path] = digest
+        else:
+            self.added[path] = digest
+
+    def record_removal(self, path: str) -> None:
+        path = self.relative(path)
+        if path is None:
+            return
+        # Something created during this build and gone again never reached the deploy target
+        if path in self.added:
+            del self.added[path]
+        else:
+            self.modified.pop(path, None)
+            self.removed.add(path)
+
+    def to_dict(self) -> dict:
+        def with_hashes(paths):
+            hashes = {}
+            for path, digest in sorted(paths.items()):
+                full_path = os.path.join(self.output_dir, path)
+                if digest is None and os.path.exists(full_path):
+                    digest = hash_file(full_path)
+                hashes[path] = digest
+            return hashes
+
+        return {
+            "version": DEPLOY_REPORT_VERSION,
+            "full": self.full,
+            "added": with_hashes(self.added),
+            "modified": with_hashes(self.modified),
+            "removed": sorted(self.removed),
+        }
+
+    def save(self, path: str) -> None:
+        write_json(path, self.to_dict())
+
+    def summary(self) -> str:
+        return f"{len(self.added)} added, {len(self.modified)} modified, {len(self.removed)} removed"
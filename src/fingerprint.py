@@ -0,0 +1,93 @@
+from htmlnode import HTMLNode
+from manifest import hash_bytes, hash_file
+from template import map_srcset
+from output_writer import OutputWriter, write_output_if_changed
+from deploy_report import DeployReport
+import json
+import os
+
+# Files referenced from pages and templates, others (robots.txt, favicon.ico, ...) are fetched by
+# name and keep it
+FINGERPRINT_EXTENSIONS = (".css", ".js", ".mjs", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg", ".ico", ".woff", ".woff2")
+FINGERPRINT_LENGTH = 10
+
+
+def fingerprinted_name(rel_path: str, digest: str) -> str:
+    """
+    index.css with content hash 3f2a... is index.3f2a1b9c0d.css
+    """
+    root, extension = os.path.splitext(rel_path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{extension}"
+
+
+def fingerprint_assets(static_dir: str) -> dict[str, str]:
+    """
+    maps every fingerprinted file in static_dir, relative to it, to its name with its content hash
+    """
+    names = {}
+    if os.path.exists(static_dir):
+        for root, dirs, files in os.walk(static_dir):
+            dirs.sort()
+            for file_item in sorted(files):
+                if not file_item.lower().endswith(FINGERPRINT_EXTENSIONS):
+                    continue
+                source = os.path.join(root, file_item)
+                rel_path = os.path.relpath(source, static_dir)
+                names[rel_path] = fingerprinted_name(rel_path, hash_file(source))
+    return names
+
+
+def asset_urls(names: dict[str, str]) -> dict:
+    """
+    what pages and the template need to link to fingerprinted files, in a form that can be sent
+    to pool workers:
+
+    urls - maps the root-relative url of every fingerprinted file to its hashed url\n
+    digest - changes whenever any hashed name does
+    """
+    urls = {"/" + rel_path.replace(os.sep, "/"): "/" + name.replace(os.sep, "/") for rel_path, name in names.items()}
+    return {"urls": urls, "digest": hash_bytes(json.dumps(urls, sort_keys=True).encode())}
+
+
+def write_asset_manifest(path: str, assets: dict, report: DeployReport = None) -> OutputWriter:
+    """
+    writes the logical to hashed url mapping for deploy scripts and anything else linking to
+    assets, the file is left alone when the mapping didn't change
+    """
+    file = write_output_if_changed(path, json.dumps(assets["urls"], indent=1, sort_keys=True))
+    if report is not None and file.changed:
+        report.record_write(path, file.existed, file.digest)
+    return file
+
+
+def remove_asset_manifest(path: str, report: DeployReport = None) -> bool:
+    """
+    removes the asset manifest of an earlier --fingerprint build, whose hashed names are gone
+    once files are copied under their own names again. Returns whether there was one.
+    """
+    if not os.path.exists(path):
+        return False
+    os.unlink(path)
+    if report is not None:
+        report.record_removal(path)
+    return True
+
+
+def fingerprint_node_urls(node: HTMLNode, assets: dict) -> HTMLNode:
+    """
+    points the href, src and srcset props of every node in the tree at the hashed names.
+    Runs before rebase_node_urls, urls are still root-relative.
+    """
+    urls = assets["urls"]
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.props:
+            for prop in ("href", "src"):
+                if current.props.get(prop) in urls:
+                    current.props[prop] = urls[current.props[prop]]
+            if "srcset" in current.props:
+                current.props["srcset"] = map_srcset(current.props["srcset"], lambda url: urls.get(url, url))
+        if current.children:
+            stack.extend(current.children)
+    return node
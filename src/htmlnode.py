@@ -1,3 +1,5 @@
+import sys
+
 
 class HTMLNode():
     """
@@ -10,16 +12,32 @@ class HTMLNode():
     props - A dictionary of key-value pairs representing the attributes of the HTML tag. For example, 
     ka link (<a> tag) might have {"href": "https://www.google.com"}
 
+    Nodes use __slots__ instead of a per-instance __dict__, tag names are interned so every
+    <p> shares one string, and empty props are stored as None rather than a fresh dict.
     """
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag: str = None, value: str = None, children: list["HTMLNode"] = None, props: dict[str, str] = None) -> None: 
-        self.tag = tag
+        self.tag = sys.intern(tag) if tag is not None else None
         self.value = value
         self.children = children
-        self.props = props
+        self.props = props or None
     
-    def to_html(self) -> Exception:
+    def to_html(self) -> str:
+        return "".join(self.iter_html())
+
+    def iter_html(self):
+        """
+        yields the HTML of this node as a sequence of fragments, subclasses implement it
+        """
         raise NotImplementedError("to_html method not implemented")
 
+    def write_html(self, out) -> None:
+        """
+        streams the HTML of this node into a file-like object (an open file, io.StringIO, ...)
+        """
+        out.writelines(self.iter_html())
+
     def props_to_html(self) -> None:
         if self.props is None:
             return ""
@@ -38,6 +56,8 @@ class LeafNode(HTMLNode):
     For example, a simple p tag with some text inside of it:\n
     p This is a paragraph of text./p
     """
+    __slots__ = ()
+
     def __init__(self, tag: str,value: str, props: dict[str, str] = None):
         super().__init__(tag, value, None, props,)
     
@@ -49,6 +69,9 @@ class LeafNode(HTMLNode):
 
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
 
+    def iter_html(self):
+        yield self.to_html()
+
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
 
@@ -57,21 +80,34 @@ class ParentNode(HTMLNode):
     ParentNode class will handle the nesting of HTML nodes inside of one another.\n 
     Any HTML node that's not "leaf" node (i.e. it has children) is a "parent" node.
     """
+    __slots__ = ()
+
     def __init__(self, tag: str, children: list["HTMLNode"], props: dict[str, str] = None):
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def check(self) -> None:
         if self.tag == None:
             raise ValueError("Invalid HTML: a tag is needed")
-        
+
         if self.children ==  None:
             raise ValueError("invalid HTML: children are needed")
 
-        children_html = ""
-        for child in self.children:
-            children_html += child.to_html() 
-        
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+    def iter_html(self):
+        # Walk the tree with an explicit stack instead of recursing, so deep documents
+        # cannot hit the recursion limit. The stack holds nodes still to open and the
+        # closing tags of nodes that are already open.
+        stack = [self]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                yield item
+            elif isinstance(item, ParentNode):
+                item.check()
+                yield f"<{item.tag}{item.props_to_html()}>"
+                stack.append(f"</{item.tag}>")
+                stack.extend(reversed(item.children))
+            else:
+                yield from item.iter_html()
 
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
\ No newline at end of file
@@ -1,6 +1,10 @@
 from textnode import TextNode, TextType
 import re
 
+# Compiled once at import instead of looked up in re's cache on every call
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
 def split_nodes_by_delimiter(old_nodes: TextNode, delimiter: str, text_type:TextType) -> list[TextNode]:
     """
      create TextNodes from raw markdown strings
@@ -11,6 +15,12 @@ def split_nodes_by_delimiter(old_nodes: TextNode, delimiter: str, text_type:Text
         if old_node.text_type != TextType.TEXT:
             new_nodes.append(old_node)
             continue
+
+        # Nothing to split, most prose has no markup at all
+        if delimiter not in old_node.text:
+            if old_node.text != "":
+                new_nodes.append(old_node)
+            continue
         
         # Initialize a temporary list to store the split nodes from this text node
         split_nodes = []
@@ -47,14 +57,18 @@ def extract_markdown_images(text: str) -> list[tuple]:
     """
     takes raw markdown text and returns a list of tuples. Each tuple should contain the alt text and the URL of any markdown images.
     """
-    images = re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    if "![" not in text:
+        return []
+    images = IMAGE_PATTERN.findall(text)
     return images 
 
 def extract_markdown_links(text: str) -> list[tuple]:
     """
     extracts markdown links instead of images. It should return tuples of anchor text and URLs
     """
-    links = re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    if "](" not in text:
+        return []
+    links = LINK_PATTERN.findall(text)
     return links
 
 
@@ -110,16 +124,136 @@ def split_nodes_link(old_nodes: TextNode) -> list[TextNode]:
             new_nodes.append(TextNode(original_text, TextType.TEXT))
     return new_nodes
 
-def text_to_textnodes(text: str) -> list[TextNode]:
+def split_text_to_textnodes(text: str) -> list[TextNode]:
     """
-    function that can convert a raw string of markdown-flavored text into a list of TextNode objects.
+    converts markdown-flavored text with one split pass per kind of inline markup
     """
+    # Plain text comes out as a single node without running any of the passes
+    if "`" not in text and "**" not in text and "_" not in text and "](" not in text:
+        return [TextNode(text, TextType.TEXT)] if text != "" else []
+
     nodes = [TextNode(text, TextType.TEXT)]
-    
-    nodes = split_nodes_by_delimiter(nodes,'`', TextType.CODE)   
-    nodes = split_nodes_by_delimiter(nodes,'**', TextType.BOLD)   
-    nodes = split_nodes_by_delimiter(nodes,'_', TextType.ITALIC)   
-    nodes = split_nodes_image(nodes)  
-    nodes = split_nodes_link(nodes)   
-    return nodes 
 
+    nodes = split_nodes_by_delimiter(nodes,'`', TextType.CODE)
+    nodes = split_nodes_by_delimiter(nodes,'**', TextType.BOLD)
+    nodes = split_nodes_by_delimiter(nodes,'_', TextType.ITALIC)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+# Matches an image (group 1 is "!") or a link, in the order they appear
+IMAGE_OR_LINK_PATTERN = re.compile(r"(!?)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
+def scan_images_and_links(text: str, start: int, end: int, nodes: list[TextNode]) -> None:
+    if text.find("](", start, end) == -1:
+        nodes.append(TextNode(text[start:end], TextType.TEXT))
+        return
+    position = start
+    for match in IMAGE_OR_LINK_PATTERN.finditer(text, start, end):
+        if match.start() > position:
+            nodes.append(TextNode(text[position:match.start()], TextType.TEXT))
+        if match.group(1):
+            nodes.append(TextNode(match.group(2), TextType.IMAGE, match.group(3)))
+        else:
+            nodes.append(TextNode(match.group(2), TextType.LINK, match.group(3)))
+        position = match.end()
+    if position < end:
+        nodes.append(TextNode(text[position:end], TextType.TEXT))
+
+def scan_text_to_textnodes(text: str) -> list[TextNode]:
+    """
+    converts markdown-flavored text in a single left-to-right sweep.
+
+    Produces the same nodes as split_text_to_textnodes: code spans win over bold, bold
+    over italic, and images and links are only found in the plain text between them.
+    """
+    nodes = []
+    length = len(text)
+    position = 0
+    next_code = text.find("`")
+    next_bold = text.find("**")
+    next_italic = text.find("_")
+
+    while position < length:
+        # Move the lookahead for each delimiter past anything already consumed
+        if 0 <= next_code < position:
+            next_code = text.find("`", position)
+        if 0 <= next_bold < position:
+            next_bold = text.find("**", position)
+        if 0 <= next_italic < position:
+            next_italic = text.find("_", position)
+
+        starts = [index for index in (next_code, next_bold, next_italic) if index != -1]
+        if not starts:
+            scan_images_and_links(text, position, length, nodes)
+            break
+        start = min(starts)
+        if start > position:
+            scan_images_and_links(text, position, start, nodes)
+
+        # A formatted section has to close before the next delimiter that takes precedence over it
+        if start == next_code:
+            end = text.find("`", start + 1)
+            if end == -1:
+                raise ValueError("invalid markdown, formatted section not closed")
+            content, text_type, position = text[start + 1:end], TextType.CODE, end + 1
+        elif start == next_bold:
+            end = text.find("**", start + 2)
+            if end == -1 or 0 <= next_code < end:
+                raise ValueError("invalid markdown, formatted section not closed")
+            content, text_type, position = text[start + 2:end], TextType.BOLD, end + 2
+        else:
+            end = text.find("_", start + 1)
+            if end == -1 or 0 <= next_code < end or 0 <= next_bold < end:
+                raise ValueError("invalid markdown, formatted section not closed")
+            content, text_type, position = text[start + 1:end], TextType.ITALIC, end + 1
+
+        if content != "":
+            nodes.append(TextNode(content, text_type))
+    return nodes
+
+
+def compare_text_to_textnodes(text: str) -> list[TextNode]:
+    """
+    runs both tokenizers and fails loudly if they disagree, used while rolling out the scanner
+    """
+    try:
+        expected = split_text_to_textnodes(text)
+    except ValueError as e:
+        expected = e
+    try:
+        actual = scan_text_to_textnodes(text)
+    except ValueError as e:
+        actual = e
+
+    if isinstance(expected, ValueError) or isinstance(actual, ValueError):
+        if type(expected) != type(actual):
+            raise ValueError(f"inline tokenizers disagree on {text!r}: split gave {expected!r}, scan gave {actual!r}")
+        raise expected
+    if expected != actual:
+        raise ValueError(f"inline tokenizers disagree on {text!r}: split gave {expected!r}, scan gave {actual!r}")
+    return actual
+
+
+INLINE_TOKENIZERS = {
+    "split": split_text_to_textnodes,
+    "scan": scan_text_to_textnodes,
+    "compare": compare_text_to_textnodes,
+}
+inline_tokenizer = "split"
+
+def set_inline_tokenizer(name: str) -> None:
+    """
+    selects the implementation used by text_to_textnodes: "split", "scan" or "compare"
+    """
+    global inline_tokenizer
+    if name not in INLINE_TOKENIZERS:
+        raise ValueError(f"unknown inline tokenizer: {name}")
+    inline_tokenizer = name
+
+def text_to_textnodes(text: str) -> list[TextNode]:
+    """
+    function that can convert a raw string of markdown-flavored text into a list of TextNode objects.
+    """
+    return INLINE_TOKENIZERS[inline_tokenizer](text)
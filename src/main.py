@@ -1,116 +1,682 @@
-from textnode import TextType, TextNode 
-from block_markdown import markdown_to_html_node
+from textnode import TextType, TextNode
+from htmlnode import HTMLNode
+from block_markdown import markdown_to_blocks, markdown_to_html_node, stream_markdown_to_html
+from dependency_graph import DependencyGraph, page_references, page_site_path
+from manifest import BuildManifest, hash_bytes, hash_file
+from template import Template, rebase_node_urls
+from profiler import Profiler, NullProfiler
+from metadata import MetadataIndex, read_metadata, split_front_matter, skip_front_matter
+from responsive_images import ImagePipeline, set_image_attributes, VARIANT_WIDTHS
+from fingerprint import fingerprint_assets, asset_urls, write_asset_manifest, remove_asset_manifest, fingerprint_node_urls
+from ast_cache import AstCache, ast_cache_summary, AST_CACHE_SIZE
+from render_cache import BlockRenderCache, cached_markdown_to_html_node, get_process_cache, cache_summary
+from precompress import precompress_outputs, remove_precompressed
+from deploy_report import DeployReport
+from output_writer import OutputWriter, write_output_if_changed
+from static_sync import sync_static, prune_empty_dirs, LINK_MODES
+import inline_markdown
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import argparse
+import asyncio
+import hashlib
+import io
 import os
 import shutil
 import sys
- 
-if len(sys.argv) > 1:
-    base_path = sys.argv[1]
-else:
-    base_path= '/'
-
-def move_static_to_public(source_dir, destination_dir) -> None:
-    # Clear the destination directory first
-    public_path = 'docs/'
-    if os.path.exists(public_path):
-        for item in os.listdir(public_path):
-            item_path = os.path.join(public_path, item)
-            if os.path.isfile(item_path):
-                os.unlink(item_path)
-            elif os.path.isdir(item_path):
-                shutil.rmtree(item_path)
-    
-    # Create destination directory if it doesn't exist
-    if not os.path.exists(destination_dir):
-        os.makedirs(destination_dir)
-    
-    # Copy files and directories from source to destination
-    if os.path.exists(source_dir):
-        for item in os.listdir(source_dir):
-            source_item_path = os.path.join(source_dir, item)
-            destination_item_path = os.path.join(destination_dir, item)
-            
-            if os.path.isfile(source_item_path):
-                shutil.copy2(source_item_path, destination_item_path)
-            elif os.path.isdir(source_item_path):
-                # If the destination directory already exists, remove it first
-                if os.path.exists(destination_item_path):
-                    shutil.rmtree(destination_item_path)
-                shutil.copytree(source_item_path, destination_item_path)
+
+# Pages with a bigger markdown source are converted block by block instead of all at once
+STREAM_THRESHOLD = 8 * 1024 * 1024
+
+# Reads and writes in flight at once with --async-io, slow network filesystems want more
+IO_THREADS = 8
+
+# A shard keeps its manifest and graph inside its output directory, so the directory alone is
+# everything a CI worker has to hand over for the merge
+SHARD_BUILD_DIR = ".shard"
+
+
+def parse_shard(text: str) -> tuple[int, int]:
+    """
+    parses "2/4" into (2, 4), shards are numbered from 1
+    """
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a shard like 2/4, got {text!r}")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {text!r} is out of range")
+    return index, count
+
+def parse_widths(text: str) -> tuple[int]:
+    try:
+        widths = tuple(int(width) for width in text.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected widths like 480,960, got {text!r}")
+    if any(width < 1 for width in widths):
+        raise argparse.ArgumentTypeError(f"image widths must be positive, got {text!r}")
+    return widths
+
+def shard_of(rel_path: str, count: int) -> int:
+    """
+    the shard (numbered from 1) a page belongs to, decided by its path relative to the content
+    directory alone so every machine splits the tree the same way
+    """
+    digest = hashlib.sha1(rel_path.replace(os.sep, "/").encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate the static site from markdown content.")
+    parser.add_argument("base_path", nargs="?", default="/", help="path prefix for root-relative links (default: /)")
+    parser.add_argument("--full", action="store_true", help="wipe the output directory and rebuild every page")
+    parser.add_argument("--content", default="./content", help="markdown source directory")
+    parser.add_argument("--static", default="./static", help="static asset directory")
+    parser.add_argument("--template", default="./template.html", help="html template")
+    parser.add_argument("--output", default=None, help="output directory (default: ./docs, required with --shard)")
+    parser.add_argument("--manifest", default=None, help="build manifest used for incremental builds (default: ./.build/manifest.json)")
+    parser.add_argument("--graph", default=None, help="dependency graph of pages, templates and static files, see dependency_graph.py (default: ./.build/graph.json)")
+    parser.add_argument("--metadata-index", default="./.build/metadata.json", help="index of page titles and front matter refreshed after every build, see metadata.py")
+    parser.add_argument("--shard", type=parse_shard, default=None, metavar="I/N", help="render only the I-th of N shards of the content tree, see shards.py for merging them")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="number of worker processes rendering pages (default: CPU count)")
+    parser.add_argument("--inline-tokenizer", choices=sorted(inline_markdown.INLINE_TOKENIZERS), default="split", help="inline markdown tokenizer, 'compare' runs both and fails on any difference")
+    parser.add_argument("--stream-threshold", type=int, default=STREAM_THRESHOLD, help="markdown files larger than this many bytes are converted block by block to bound memory (default: 8 MiB)")
+    parser.add_argument("--profile", action="store_true", help="time every stage of every page and print the slowest ones")
+    parser.add_argument("--profile-trace", default=None, help="also write the timings to this file in Chrome trace format (implies --profile)")
+    parser.add_argument("--checksum", action="store_true", help="compare static files by content hash when size matches but mtime differs")
+    parser.add_argument("--link", choices=LINK_MODES, default="copy", help="how static files are placed in the output directory, falls back to copying")
+    parser.add_argument("--block-cache", type=int, default=0, metavar="ENTRIES", help="cache rendered blocks shared across pages, keeping at most this many (default: off)")
+    parser.add_argument("--block-cache-file", default=None, help="keep the block cache in this file between builds")
+    parser.add_argument("--ast-cache", action="store_true", help="keep parsed pages between builds, so template or base path changes don't parse unchanged pages again")
+    parser.add_argument("--ast-cache-dir", default="./.build/ast", help="where parsed pages are kept, see ast_cache.py for clearing it")
+    parser.add_argument("--ast-cache-size", type=int, default=AST_CACHE_SIZE // (1024 * 1024), metavar="MB", help="least recently used parsed pages are dropped past this size (default: 256)")
+    parser.add_argument("--responsive-images", action="store_true", help="give images width, height, lazy loading and, with Pillow installed, resized variants in srcset")
+    parser.add_argument("--image-widths", type=parse_widths, default=VARIANT_WIDTHS, help="widths of the resized image variants (default: 480,960,1440)")
+    parser.add_argument("--image-cache", default="./.build/images", help="where resized image variants are kept between builds")
+    parser.add_argument("--fingerprint", action="store_true", help="copy css, js, images and fonts under names with their content hash and link to those, so they can be cached forever")
+    parser.add_argument("--asset-manifest", default=None, help="where the map from asset urls to hashed urls is written (default: asset-manifest.json in the output directory)")
+    parser.add_argument("--deploy-report", default="./.build/deploy-report.json", help="where the list of outputs this build added, modified and removed is written")
+    parser.add_argument("--minify", action="store_true", help="strip comments and whitespace from the template, pages are rendered without any")
+    parser.add_argument("--precompress", action="store_true", help="write .gz (and .br, if brotli is installed) copies of html, css and other text outputs")
+    parser.add_argument("--async-io", action="store_true", help="overlap reading sources, rendering and writing pages, for slow (e.g. network) filesystems")
+    parser.add_argument("--io-threads", type=int, default=IO_THREADS, help="reads and writes in flight at once with --async-io (default: 8)")
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.io_threads < 1:
+        parser.error("--io-threads must be at least 1")
+    if args.output is None:
+        # Shard pages and their .shard directory must never land in the deployed tree
+        if args.shard is not None:
+            parser.error("--shard needs its own --output directory")
+        args.output = "./docs"
+
+    build_dir = os.path.join(args.output, SHARD_BUILD_DIR) if args.shard else "./.build"
+    if args.manifest is None:
+        args.manifest = os.path.join(build_dir, "manifest.json")
+    if args.graph is None:
+        args.graph = os.path.join(build_dir, "graph.json")
+    return args
+
 
 def extract_title(markdown: str) -> str:
     for line in markdown.splitlines():  # Split the markdown content into lines
         if line.startswith('#'):  # Look for the first header
-            return line.strip("#").strip()  
+            return line.strip("#").strip()
     raise Exception("No header found in markdown input")
 
+def read_title(from_path: str) -> str:
+    # Same as extract_title, but stops reading the file at the first header, a front matter title comes first
+    title = read_metadata(from_path)["title"]
+    if title is None:
+        raise Exception("No header found in markdown input")
+    return str(title)
+
+
+def transform_page_node(node, base_path: str, images: dict = None, assets: dict = None) -> None:
+    # Image attributes and hashed names are looked up by the urls as written, so rebasing goes last
+    if images is not None:
+        set_image_attributes(node, images)
+    if assets is not None:
+        fingerprint_node_urls(node, assets)
+    rebase_node_urls(node, base_path)
+
+def parse_page(markdown_content: str) -> tuple[str, dict, HTMLNode]:
+    """
+    returns a page's title, references and node tree, links not yet rewritten
+    """
+    front_matter, markdown_content = split_front_matter(markdown_content)
+    html_node = markdown_to_html_node(markdown_content)
+    title = str(front_matter["title"]) if "title" in front_matter else extract_title(markdown_content)
+    return title, page_references(markdown_to_blocks(markdown_content)), html_node
+
+def generate_page(from_path: str, template: Template | str, dest_path: str, base_path: str, stream_threshold: int = STREAM_THRESHOLD, profiler: Profiler = None, block_cache: BlockRenderCache = None, markdown_content: str = None, out=None, images: dict = None, assets: dict = None, ast_cache: AstCache = None, previous_hash: str = None, written: dict = None) -> dict[str, list[str]]:
+    """
+    renders one page and returns the urls it links to and the images it shows, see page_references.
+    With an ast_cache, pages parsed by an earlier build are rendered from their cached tree.
+
+    The page is only written when it differs from the output already there, see OutputWriter.
+    previous_hash is the hash the manifest recorded for that output, and written, if given, gets
+    the new output's hash, whether the file was replaced and whether it existed before.
+    """
+    # Callers rendering many pages pass a compiled Template, a path is compiled on the spot
+    if not isinstance(template, Template):
+        template = Template.load(template, base_path)
+    if profiler is None:
+        profiler = NullProfiler()
+    print(f"Generating page from {from_path} to {dest_path} using {template.path}...")
+
+    # The async pipeline reads the markdown itself and writes whatever ends up in out
+    if markdown_content is None:
+        if os.path.getsize(from_path) > stream_threshold:
+            with profiler.stage(from_path, "stream"):
+                return generate_page_streaming(from_path, template, dest_path, base_path, images, assets, previous_hash, written)
 
-def generate_page(from_path: str, template_path: str, dest_path: str, base_path: str) -> None:
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}...")
-    markdown_content = ""
-    template_content = ""
-
-    #read markdown content
-    with open(from_path, 'r') as markdown_file:
-        lines = markdown_file.read()
-        markdown_content += lines
-        markdown_res = markdown_to_html_node(markdown_content).to_html()
-
-    #read template content  
-    with open(template_path, "r") as template_file:
-        lines = template_file.read()
-        template_content += lines
-
-        # Extract title and replace placeholders
-        template_title = extract_title(markdown_content)
-        template_content = template_content.replace('{{ Title }}', template_title)
-        template_content = template_content.replace('{{ Content }}', markdown_res)
-
-        template_content = template_content.replace('href="/', f'href="{base_path}')
-        template_content = template_content.replace('src="/', f'src="{base_path}')
-      
-      
-    # Ensure directories exist before writing the file
-    if os.path.dirname(dest_path):  # Check parent directory
-        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-
-    # Write the final content to the destination path
-    with open(dest_path, "w") as file:
-        file.write(template_content) 
-
-def generate_pages_recursively(dir_path_content: str, template_path: str, dest_dir_path: str, base_path: str) -> None:
+        #read markdown content
+        with profiler.stage(from_path, "read"):
+            with open(from_path, 'r') as markdown_file:
+                markdown_content = markdown_file.read()
+
+    # Rewrite root-relative links on the node tree, the template was rewritten when it was compiled
+    transform = lambda node: transform_page_node(node, base_path, images, assets)
+
+    # The title is found before opening the output, a page without one must not leave a partial file behind
+    with profiler.stage(from_path, "parse"):
+        if ast_cache is not None:
+            key = ast_cache.key(markdown_content)
+            parsed = ast_cache.get(key)
+            if parsed is None:
+                parsed = parse_page(markdown_content)
+                # Stored before transform, the tree is reused with other base paths and assets
+                ast_cache.put(key, *parsed)
+            title, references, html_node = parsed
+            transform(html_node)
+        elif block_cache is not None:
+            front_matter, markdown_content = split_front_matter(markdown_content)
+            # Cached blocks hold image attributes and hashed names too, so they only count for the same ones
+            cache_context = base_path
+            if images is not None:
+                cache_context += f"\0{images['digest']}"
+            if assets is not None:
+                cache_context += f"\0assets {assets['digest']}"
+            html_node = cached_markdown_to_html_node(markdown_content, block_cache, cache_context, transform)
+            title = str(front_matter["title"]) if "title" in front_matter else extract_title(markdown_content)
+            references = page_references(markdown_to_blocks(markdown_content))
+        else:
+            title, references, html_node = parse_page(markdown_content)
+            transform(html_node)
+
+    if out is not None:
+        with profiler.stage(from_path, "render"):
+            template.write(out, Title=title, Content=html_node)
+        return references
+
+    if profiler.enabled:
+        # Render into memory first so templating and disk I/O are timed separately
+        with profiler.stage(from_path, "render"):
+            buffer = io.StringIO()
+            template.write(buffer, Title=title, Content=html_node)
+        with profiler.stage(from_path, "write"):
+            file = write_output_if_changed(dest_path, buffer.getvalue(), previous_hash)
+    else:
+        # Stream the filled in template straight to the destination path
+        with OutputWriter(dest_path, previous_hash) as file:
+            template.write(file, Title=title, Content=html_node)
+    if written is not None:
+        written.update(hash=file.digest, changed=file.changed, existed=file.existed)
+    return references
+
+def generate_page_streaming(from_path: str, template: Template, dest_path: str, base_path: str, images: dict = None, assets: dict = None, previous_hash: str = None, written: dict = None) -> dict[str, list[str]]:
+    """
+    renders a page without ever holding the whole markdown or html in memory: blocks are read
+    line by line, converted and written out as soon as each one is complete
+    """
+    title = read_title(from_path)
+
+    references = {"links": [], "images": []}
+    def collect_references(block):
+        for kind, urls in page_references([block]).items():
+            references[kind].extend(urls)
+
+    with open(from_path, 'r') as markdown_file, OutputWriter(dest_path, previous_hash) as file:
+        def write_content(out):
+            stream_markdown_to_html(skip_front_matter(markdown_file), out, lambda node: transform_page_node(node, base_path, images, assets), collect_references)
+        template.write(file, Title=title, Content=write_content)
+    if written is not None:
+        written.update(hash=file.digest, changed=file.changed, existed=file.existed)
+    return references
+
+def remove_output(output_path: str, dest_dir_path: str, report: DeployReport = None) -> None:
+    if os.path.exists(output_path):
+        print(f"Removing {output_path}, its source was deleted...")
+        os.unlink(output_path)
+        if report is not None:
+            report.record_removal(output_path)
+
+    prune_empty_dirs(output_path, dest_dir_path)
+
+class PageGenerationError(Exception):
+    """
+    raised after a build when one or more pages failed to render.
+
+    failures - A list of (source path, error message) tuples, one per failed page
+    """
+    def __init__(self, failures: list[tuple[str, str]]) -> None:
+        self.failures = failures
+        lines = [f"{len(failures)} page(s) failed to generate:"]
+        for source, error in failures:
+            lines.append(f"  {source}: {error}")
+        super().__init__("\n".join(lines))
+
+
+def page_dest_path(file_path: str, dir_path_content: str, dest_dir_path: str) -> str:
+    """
+    maps content/blog/post/index.md to docs/blog/post/index.html
+    """
+    # Calculate the relative path, and construct the destination path
+    rel_path = os.path.relpath(file_path, dir_path_content)
+    dest_file_name = os.path.splitext(rel_path)[0] + ".html"
+    return os.path.normpath(os.path.join(dest_dir_path, dest_file_name))
+
+def collect_pages(dir_path_content: str, dest_dir_path: str) -> list[tuple[str, str]]:
+    """
+    walks the content directory and returns (markdown path, html path) pairs in a stable order
+    """
+    pages = []
     for root, dirs, files in os.walk(dir_path_content):
-        for file_item in files:
+        dirs.sort()
+        for file_item in sorted(files):
             if file_item.endswith(".md"):
-                # Build the full path to the markdown file
-                file_path = os.path.join(root, file_item)
+                # Build the full path to the markdown file, normalized as the manifest and graph keys
+                file_path = os.path.normpath(os.path.join(root, file_item))
+                pages.append((file_path, page_dest_path(file_path, dir_path_content, dest_dir_path)))
+    return pages
+
+def generate_page_safely(from_path: str, template: Template, dest_path: str, base_path: str, page_options: dict = None, markdown_content: str = None, previous_hash: str = None) -> dict:
+    """
+    runs generate_page and returns a result dict instead of raising, so a single broken page
+    never takes the rest of the build down with it. When markdown_content is passed the page is
+    rendered from it and returned rather than written, the caller does the I/O.
+
+    error - None on success or the error message on failure\n
+    html - the rendered page, when markdown_content was passed and rendering succeeded\n
+    output_hash - sha256 of the written page, when it was written\n
+    changed - whether the page differed from the output already there, when it was written\n
+    existed - whether there was an output to compare with, when it was written\n
+    references - the page's links and images, when rendering succeeded\n
+    profile - the page's stage records, when page_options has profile=True\n
+    cache - block cache hits, misses and evictions for this page, when page_options has a block_cache\n
+    cache_entries - blocks rendered for this page, when the block cache is persisted\n
+    ast_cache - AST cache hits and misses for this page, when page_options has an ast_cache
+    """
+    options = dict(page_options or {})
+    profiler = Profiler() if options.pop("profile", False) else None
+    cache_options = options.pop("block_cache", None)
+    block_cache = get_process_cache(**cache_options) if cache_options else None
+    ast_cache_options = options.pop("ast_cache", None)
+    ast_cache = AstCache(**ast_cache_options) if ast_cache_options else None
+    if block_cache is not None:
+        stats_before = block_cache.stats()
+
+    out = io.StringIO() if markdown_content is not None else None
+
+    result = {"error": None}
+    written = {}
+    try:
+        result["references"] = generate_page(from_path, template, dest_path, base_path, profiler=profiler, block_cache=block_cache, markdown_content=markdown_content, out=out, ast_cache=ast_cache, previous_hash=previous_hash, written=written, **options)
+        if out is not None:
+            result["html"] = out.getvalue()
+        if written:
+            result["output_hash"] = written["hash"]
+            result["changed"] = written["changed"]
+            result["existed"] = written["existed"]
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    if profiler is not None:
+        result["profile"] = profiler.records
+    if block_cache is not None:
+        result["cache"] = {name: count - stats_before[name] for name, count in block_cache.stats().items()}
+        if block_cache.path is not None:
+            result["cache_entries"] = block_cache.drain_new_entries()
+    if ast_cache is not None:
+        result["ast_cache"] = ast_cache.stats()
+    return result
+
+def generate_pages_serially(pages: list[tuple[str, str]], template: Template, base_path: str, page_options: dict = None, output_hashes: dict[str, str] = None) -> dict[str, dict]:
+    output_hashes = output_hashes or {}
+    results = {}
+    for file_path, dest_file_path in pages:
+        results[file_path] = generate_page_safely(file_path, template, dest_file_path, base_path, page_options, previous_hash=output_hashes.get(dest_file_path))
+    return results
+
+def generate_pages_in_parallel(pages: list[tuple[str, str]], template: Template, base_path: str, jobs: int, page_options: dict = None, output_hashes: dict[str, str] = None) -> dict[str, dict]:
+    output_hashes = output_hashes or {}
+    results = {}
+    # Workers may not inherit module state (spawn start method), so hand them the tokenizer choice
+    with ProcessPoolExecutor(max_workers=jobs, initializer=inline_markdown.set_inline_tokenizer, initargs=(inline_markdown.inline_tokenizer,)) as executor:
+        futures = {}
+        for file_path, dest_file_path in pages:
+            future = executor.submit(generate_page_safely, file_path, template, dest_file_path, base_path, page_options, previous_hash=output_hashes.get(dest_file_path))
+            futures[future] = file_path
+
+        for future in as_completed(futures):
+            file_path = futures[future]
+            try:
+                results[file_path] = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. killed or out of memory), not just the page
+                results[file_path] = {"error": f"{type(e).__name__}: {e}"}
+    return results
+
+def read_source(file_path: str, stream_threshold: int, profiler: Profiler) -> str:
+    # Sources big enough to be streamed are left for generate_page to read block by block
+    with profiler.stage(file_path, "read"):
+        if os.path.getsize(file_path) > stream_threshold:
+            return None
+        with open(file_path, "r") as markdown_file:
+            return markdown_file.read()
+
+def write_output(file_path: str, dest_file_path: str, html: str, profiler: Profiler, previous_hash: str = None) -> OutputWriter:
+    with profiler.stage(file_path, "write"):
+        return write_output_if_changed(dest_file_path, html, previous_hash)
+
+async def run_page_pipeline(pages: list[tuple[str, str]], template: Template, base_path: str, jobs: int, page_options: dict, io_threads: int, output_hashes: dict[str, str] = None) -> dict[str, dict]:
+    """
+    reads, renders and writes pages as three stages connected by bounded queues. Reads and writes
+    run on a thread pool, so a page stuck on a slow read doesn't hold up rendering or writing the
+    pages around it, while the queue bounds keep at most a few pages of markdown and html in memory.
+    """
+    loop = asyncio.get_running_loop()
+    options = page_options or {}
+    stream_threshold = options.get("stream_threshold", STREAM_THRESHOLD)
+    profiler = Profiler() if options.get("profile") else NullProfiler()
+    read_queue = asyncio.Queue(maxsize=io_threads * 2)
+    write_queue = asyncio.Queue(maxsize=io_threads * 2)
+    remaining_pages = iter(pages)
+    output_hashes = output_hashes or {}
+    results = {}
+
+    async def read_pages():
+        for file_path, dest_file_path in remaining_pages:
+            try:
+                markdown_content = await loop.run_in_executor(io_executor, read_source, file_path, stream_threshold, profiler)
+            except Exception as e:
+                results[file_path] = {"error": f"{type(e).__name__}: {e}"}
+                continue
+            await read_queue.put((file_path, dest_file_path, markdown_content))
+
+    async def render_pages():
+        while (item := await read_queue.get()) is not None:
+            file_path, dest_file_path, markdown_content = item
+            try:
+                result = await loop.run_in_executor(render_executor, generate_page_safely, file_path, template, dest_file_path, base_path, page_options, markdown_content, output_hashes.get(dest_file_path))
+            except Exception as e:
+                # The worker itself died (e.g. killed or out of memory), not just the page
+                result = {"error": f"{type(e).__name__}: {e}"}
+            results[file_path] = result
+            if "html" in result:
+                await write_queue.put((file_path, dest_file_path, result.pop("html")))
+
+    async def write_pages():
+        while (item := await write_queue.get()) is not None:
+            file_path, dest_file_path, html = item
+            try:
+                file = await loop.run_in_executor(io_executor, write_output, file_path, dest_file_path, html, profiler, output_hashes.get(dest_file_path))
+                results[file_path]["output_hash"] = file.digest
+                results[file_path]["changed"] = file.changed
+                results[file_path]["existed"] = file.existed
+            except Exception as e:
+                results[file_path]["error"] = f"{type(e).__name__}: {e}"
+
+    # A single render thread still leaves the event loop free to keep reads and writes going
+    if jobs > 1:
+        render_executor = ProcessPoolExecutor(max_workers=jobs, initializer=inline_markdown.set_inline_tokenizer, initargs=(inline_markdown.inline_tokenizer,))
+    else:
+        render_executor = ThreadPoolExecutor(max_workers=1)
+    with ThreadPoolExecutor(max_workers=io_threads) as io_executor, render_executor:
+        readers = [asyncio.create_task(read_pages()) for _ in range(io_threads)]
+        renderers = [asyncio.create_task(render_pages()) for _ in range(jobs)]
+        writers = [asyncio.create_task(write_pages()) for _ in range(io_threads)]
+
+        # Shut each stage down once the one feeding it is done
+        await asyncio.gather(*readers)
+        for _ in renderers:
+            await read_queue.put(None)
+        await asyncio.gather(*renderers)
+        for _ in writers:
+            await write_queue.put(None)
+        await asyncio.gather(*writers)
+
+    # Reads and writes were timed here, file them with the stages the renderer timed
+    for record in profiler.records:
+        results[record["page"]].setdefault("profile", []).append(record)
+    return results
+
+def generate_pages_async(pages: list[tuple[str, str]], template: Template, base_path: str, jobs: int = 1, page_options: dict = None, io_threads: int = IO_THREADS, output_hashes: dict[str, str] = None) -> dict[str, dict]:
+    return asyncio.run(run_page_pipeline(pages, template, base_path, jobs, page_options, io_threads, output_hashes))
+
+def generate_pages_recursively(dir_path_content: str, template_path: str, dest_dir_path: str, base_path: str, manifest: BuildManifest = None, jobs: int = 1, page_options: dict = None, on_result=None, io_threads: int = 0, graph: DependencyGraph = None, changed_static: set[str] = None, shard: tuple[int, int] = None, minify: bool = False, report: DeployReport = None) -> None:
+    """
+    renders every markdown file under dir_path_content. page_options are passed on to generate_page,
+    and on_result, if given, is called with (source path, result dict) for every rendered page.
+    io_threads above 0 reads and writes pages on that many threads, overlapped with rendering.
+    graph, if given, is updated with what every rendered page references, and pages it says use
+    one of the changed_static files (relative to the static directory) are rendered again.
+    shard, an (index, count) pair, limits the build to the pages in that shard.
+    minify compiles the template without its comments and whitespace. A page_options "assets" entry
+    (see fingerprint.py) points links to static files in pages and the template at their hashed names.
+    report, if given, records the pages written and removed.
+    """
+    assets = page_options.get("assets") if page_options else None
+    # The template is read and compiled once for the whole build
+    template = Template.load(template_path, base_path, minify, assets)
+    template_hash = template.digest
+    # Without the graph or the changed static files there's no telling which pages link to a
+    # renamed asset or a changed image, any new hash or attribute renders every page again
+    known = graph is not None and changed_static is not None
+    images = page_options.get("images") if page_options else None
+    if images is not None:
+        # Turning responsive images on or off, or other widths, change every page like a new template would
+        widths = images["widths"] if known else f"{images['widths']} {images['digest']}"
+        template_hash = hash_bytes(f"{template_hash}\0images {widths}".encode())
+    if assets is not None:
+        template_hash = hash_bytes(f"{template_hash}\0assets {'on' if known else assets['digest']}".encode())
+    pages = collect_pages(dir_path_content, dest_dir_path)
+    if shard is not None:
+        # Pages of other shards count as absent, so outputs left from a different split are removed
+        index, count = shard
+        pages = [page for page in pages if shard_of(os.path.relpath(page[0], dir_path_content), count) == index]
+        if manifest is not None:
+            # Lets the merge check it was given every shard of one split
+            manifest.shard = [index, count]
+
+    dependents = set()
+    if graph is not None and changed_static:
+        dependents = set(graph.dependents(site_paths={"/" + rel_path.replace(os.sep, "/") for rel_path in changed_static}))
+        # Pages the graph doesn't know (it was lost or unreadable while the manifest survived) may
+        # use any of the changed files. Rendering them also records them in the graph again.
+        recorded = set(os.path.normpath(source) for source in graph.pages)
+        dependents.update(file_path for file_path, dest_file_path in pages if file_path not in recorded)
+
+    # Skip pages whose markdown, template, base path, output and static files they use are unchanged
+    pending = []
+    source_hashes = {}
+    for file_path, dest_file_path in pages:
+        if manifest is not None:
+            source_hashes[file_path] = hash_file(file_path)
+            if file_path not in dependents and manifest.is_current(file_path, source_hashes[file_path], template_hash, base_path, dest_file_path):
+                continue
+        pending.append((file_path, dest_file_path))
+
+    # Pages rendered again are compared with what the last build wrote, unchanged ones aren't written
+    output_hashes = {}
+    if manifest is not None:
+        for file_path, dest_file_path in pending:
+            entry = manifest.pages.get(file_path)
+            if entry is not None and entry.get("output") == dest_file_path and entry.get("output_hash"):
+                output_hashes[dest_file_path] = entry["output_hash"]
+
+    # Generate the HTML files
+    if io_threads > 0:
+        results = generate_pages_async(pending, template, base_path, jobs, page_options, io_threads, output_hashes)
+    elif jobs > 1 and len(pending) > 1:
+        results = generate_pages_in_parallel(pending, template, base_path, jobs, page_options, output_hashes)
+    else:
+        results = generate_pages_serially(pending, template, base_path, page_options, output_hashes)
+
+    unchanged = sum(1 for result in results.values() if result.get("changed") is False)
+    if unchanged:
+        print(f"{unchanged} page(s) rendered the same as before, their outputs were left alone")
+
+    errors = {}
+    for file_path, dest_file_path in pending:
+        result = results[file_path]
+        if result["error"] is not None:
+            errors[file_path] = result["error"]
+        if on_result is not None:
+            on_result(file_path, result)
+        if graph is not None and result["error"] is None:
+            graph.record(file_path, template_path, page_site_path(file_path, dir_path_content), result["references"])
+        if report is not None and result.get("changed"):
+            report.record_write(dest_file_path, result["existed"], result["output_hash"])
+
+    if manifest is not None:
+        for file_path, dest_file_path in pending:
+            # Failed pages stay out of the manifest so the next build retries them
+            if file_path in errors:
+                manifest.remove(file_path)
+            else:
+                manifest.record(file_path, source_hashes[file_path], template_hash, base_path, dest_file_path, results[file_path].get("output_hash"))
+
+        # Delete outputs whose markdown source no longer exists, unless a page of this build owns
+        # the same output (a source recorded under another spelling of its path, say)
+        seen_sources = set(file_path for file_path, dest_file_path in pages)
+        seen_outputs = set(os.path.abspath(dest_file_path) for file_path, dest_file_path in pages)
+        for source in sorted(set(manifest.pages) - seen_sources):
+            entry = manifest.remove(source)
+            if os.path.abspath(entry["output"]) not in seen_outputs:
+                remove_output(entry["output"], dest_dir_path, report)
+
+    if graph is not None:
+        seen_sources = set(file_path for file_path, dest_file_path in pages)
+        for source in set(graph.pages) - seen_sources:
+            graph.remove(source)
+
+    if errors:
+        raise PageGenerationError(sorted(errors.items()))
+
+
+def report_build(profiler: Profiler, trace_path: str = None, block_cache: BlockRenderCache = None, cache_stats: dict = None, ast_cache: AstCache = None, ast_stats: dict = None) -> None:
+    if block_cache is not None:
+        block_cache.save()
+        print(cache_summary(cache_stats, len(block_cache.entries)))
+    if ast_cache is not None:
+        # Workers only ever add entries, the size limit is enforced once per build
+        ast_cache.prune()
+        print(ast_cache_summary(ast_stats))
+    if not profiler.enabled:
+        return
+    print(profiler.summary())
+    if trace_path:
+        profiler.write_trace(trace_path)
+        print(f"Wrote build trace to {trace_path}")
+
+
+def main(argv: list[str] = None) -> None:
+    args = parse_args(argv)
+    inline_markdown.set_inline_tokenizer(args.inline_tokenizer)
+
+    # A full rebuild starts from an empty manifest so every page is rendered again
+    if args.full:
+        manifest = BuildManifest(args.manifest)
+        graph = DependencyGraph(args.graph)
+    else:
+        manifest = BuildManifest.load(args.manifest)
+        graph = DependencyGraph.load(args.graph)
+
+    profiler = Profiler() if args.profile or args.profile_trace else NullProfiler()
+    page_options = {"stream_threshold": args.stream_threshold, "profile": profiler.enabled}
 
-                # Calculate the relative path, and construct the destination path
-                rel_path = os.path.relpath(root, dir_path_content)
-                dest_dir = os.path.join("docs", rel_path)
+    # The block cache lives in each rendering process, this one collects what they report back
+    block_cache = None
+    cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+    if args.block_cache > 0:
+        page_options["block_cache"] = {"max_entries": args.block_cache, "path": args.block_cache_file}
+        block_cache = get_process_cache(args.block_cache, args.block_cache_file)
 
-                # Ensure the directory exists
-                os.makedirs(dest_dir, exist_ok=True)
+    ast_cache = None
+    ast_stats = {"hits": 0, "misses": 0}
+    if args.ast_cache:
+        ast_cache = AstCache(args.ast_cache_dir, args.ast_cache_size * 1024 * 1024)
+        page_options["ast_cache"] = {"path": ast_cache.path, "max_bytes": ast_cache.max_bytes}
 
-                # Create the destination html file path
-                dest_file_name = os.path.splitext(file_item)[0] + ".html"
-                dest_dir_path = os.path.join(dest_dir, dest_file_name)
+    # Shard outputs are only an intermediate step, the report comes from merging them
+    report = DeployReport(args.output, args.full) if args.shard is None else None
 
-                # Generate the HTML file
-                generate_page(file_path, template_path, dest_dir_path, base_path)
+    def on_result(file_path, result):
+        profiler.merge(result.get("profile", []))
+        for name, count in result.get("cache", {}).items():
+            cache_stats[name] += count
+        for name, count in result.get("ast_cache", {}).items():
+            ast_stats[name] += count
+        for key, html in result.get("cache_entries", {}).items():
+            block_cache.put(key, html)
 
+    #Move static files to public directory, incremental builds only copy what changed
+    with profiler.stage(None, "static"):
+        names = fingerprint_assets(args.static) if args.fingerprint else None
+        changed_static = None
+        if args.full and os.path.exists(args.output):
+            # The sync places every static file again, linked as --link asks
+            shutil.rmtree(args.output)
+        # Shards only hold pages, static files are synced once when the shards are merged
+        if args.shard is None:
+            changed_static = set()
+            sync_static(args.static, args.output, manifest, args.checksum, args.link, changed_static, names, report)
+    if args.fingerprint:
+        page_options["assets"] = asset_urls(names)
+        if args.shard is None:
+            write_asset_manifest(args.asset_manifest or os.path.join(args.output, "asset-manifest.json"), page_options["assets"], report)
+    elif args.shard is None:
+        remove_asset_manifest(args.asset_manifest or os.path.join(args.output, "asset-manifest.json"), report)
 
+    if args.responsive_images:
+        with profiler.stage(None, "images"):
+            pipeline = ImagePipeline(args.static, args.output, args.image_cache, args.image_widths)
+            pipeline.load()
+            pipeline.run(place=args.shard is None, report=report)
+            pipeline.save()
+        page_options["images"] = pipeline.attributes()
+    try:
+        with profiler.stage(None, "all pages"):
+            generate_pages_recursively(args.content, args.template, args.output, args.base_path, manifest, args.jobs, page_options, on_result, args.io_threads if args.async_io else 0, graph, changed_static, args.shard, args.minify, report)
+    except PageGenerationError as e:
+        # Keep the pages that did render so the next build only retries the failures
+        manifest.save()
+        graph.save()
+        if report is not None:
+            report.save(args.deploy_report)
+        report_build(profiler, args.profile_trace, block_cache, cache_stats, ast_cache, ast_stats)
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    # A shard only sees part of the content, the index is refreshed where the shards are merged
+    if args.shard is None:
+        with profiler.stage(None, "metadata"):
+            metadata_index = MetadataIndex.load(args.metadata_index)
+            metadata_index.refresh(args.content)
+            metadata_index.save()
+    if args.precompress:
+        with profiler.stage(None, "precompress"):
+            counts = precompress_outputs(args.output, manifest, args.jobs, report)
+        print(f"Precompressed {counts['compressed']} file(s), {counts['unchanged']} unchanged")
+    elif manifest.compressed:
+        print(f"Removed the compressed copies of {remove_precompressed(args.output, manifest, report)} file(s), --precompress is off")
+    manifest.save()
+    graph.save()
+    if report is not None:
+        report.save(args.deploy_report)
+        print(f"Deploy report: {report.summary()}, written to {args.deploy_report}")
+    report_build(profiler, args.profile_trace, block_cache, cache_stats, ast_cache, ast_stats)
 
-def main() -> None:
-    source_directory = "./static"
-    destination_directory = "./docs"
-    content_path = "./content"
-    template_path = "./template.html"
-    
-    #Move static files to public directory
-    move_static_to_public(source_directory, destination_directory) 
-    generate_pages_recursively(content_path, template_path, destination_directory, base_path)
- 
     print("Page generation complete. Visit: http://localhost:8888")
 
 if __name__ == "__main__":
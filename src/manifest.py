@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 1
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: str, chunk_size: int = 1 << 16) -> str:
+    """
+    returns the sha256 hex digest of a file, read in chunks so large sources are never fully loaded
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_signature(path: str) -> list[int]:
+    """
+    [size, mtime] of a file, what caches compare to tell it changed without reading it
+    """
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def write_json(path: str, data, indent: int = 1) -> None:
+    """
+    writes data to a temporary file next to path first, so an interrupted build never leaves a
+    truncated file behind
+    """
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(data, file, indent=indent, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+class BuildManifest():
+    """
+    records what the last build produced so the next build can skip unchanged pages.
+
+    pages - maps a markdown source path to a dict with the keys:\n
+    hash - sha256 of the markdown source\n
+    template - sha256 of the template used to render it\n
+    base_path - the base path the page was rendered with\n
+    output - the html file that was written\n
+    output_hash - sha256 of that file, so an unchanged rendering isn't written again
+
+    static - maps each static file, relative to the static directory, to its copy in the output
+
+    static_hashes - maps each static file, relative to the static directory, to the sha256 it had
+    when it was last copied, so a copy made only because the mtime changed isn't reported as
+    modified
+
+    compressed - maps each output file with precompressed siblings to the size and mtime it had
+    when they were written and the formats written, see precompress.py
+
+    shard - [index, count] for the manifest of a shard build (main.py --shard), None otherwise
+    """
+    def __init__(self, path: str, pages: dict[str, dict] = None, static: dict[str, str] = None, compressed: dict[str, dict] = None, static_hashes: dict[str, str] = None, shard: list[int] = None) -> None:
+        self.path = path
+        self.pages = pages if pages is not None else {}
+        self.static = static if static is not None else {}
+        self.compressed = compressed if compressed is not None else {}
+        self.static_hashes = static_hashes if static_hashes is not None else {}
+        self.shard = shard
+
+    @classmethod
+    def load(cls, path: str) -> "BuildManifest":
+        # A missing or unreadable manifest just means everything gets rebuilt
+        try:
+            with open(path, "r") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return cls(path)
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        return cls(path, data.get("pages", {}), data.get("static", {}), data.get("compressed", {}), data.get("static_hashes", {}), data.get("shard"))
+
+    def save(self) -> None:
+        data = {"version": MANIFEST_VERSION, "pages": self.pages, "static": self.static, "compressed": self.compressed, "static_hashes": self.static_hashes, "shard": self.shard}
+        write_json(self.path, data)
+
+    def is_current(self, source: str, source_hash: str, template_hash: str, base_path: str, output: str) -> bool:
+        entry = self.pages.get(os.path.normpath(source))
+        if entry is None:
+            return False
+        return (
+            entry.get("hash") == source_hash
+            and entry.get("template") == template_hash
+            and entry.get("base_path") == base_path
+            and os.path.abspath(entry.get("output")) == os.path.abspath(output)
+            and os.path.exists(output)
+        )
+
+    def record(self, source: str, source_hash: str, template_hash: str, base_path: str, output: str, output_hash: str = None) -> None:
+        # ./content/a.md and content/a.md are the same page
+        self.pages[os.path.normpath(source)] = {
+            "hash": source_hash,
+            "template": template_hash,
+            "base_path": base_path,
+            "output": os.path.normpath(output),
+            "output_hash": output_hash,
+        }
+
+    def remove(self, source: str) -> dict:
+        # Keys written before they were normalized are removed as they are
+        if source in self.pages:
+            return self.pages.pop(source)
+        return self.pages.pop(os.path.normpath(source), None)
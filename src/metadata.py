@@ -0,0 +1,209 @@
+from manifest import file_signature, write_json
+from collections.abc import Iterator
+import argparse
+import itertools
+import json
+import os
+
+METADATA_INDEX_VERSION = 1
+FRONT_MATTER_DELIMITER = "---"
+
+
+def parse_front_matter_value(text: str):
+    """
+    the few YAML scalars front matter needs: quoted or bare strings, true/false, integers
+    and [a, b] lists
+    """
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1]
+    if text.startswith("[") and text.endswith("]"):
+        return [parse_front_matter_value(item) for item in text[1:-1].split(",") if item.strip() != ""]
+    if text in ("true", "false"):
+        return text == "true"
+    if text.lstrip("-").isdigit():
+        return int(text)
+    return text
+
+
+def is_front_matter_line(line: str) -> bool:
+    line = line.strip()
+    if line == "" or line.startswith("#"):
+        return True
+    key, separator, value = line.partition(":")
+    return separator != "" and key.strip() != ""
+
+
+def parse_front_matter(lines: list[str]) -> dict:
+    """
+    parses "key: value" lines, blank lines and # comments are skipped
+    """
+    metadata = {}
+    for line in lines:
+        line = line.strip()
+        if line == "" or line.startswith("#"):
+            continue
+        key, separator, value = line.partition(":")
+        if separator == "":
+            raise ValueError(f"invalid front matter line: {line!r}")
+        metadata[key.strip()] = parse_front_matter_value(value)
+    return metadata
+
+
+def read_front_matter(lines) -> tuple[dict, Iterator[str]]:
+    """
+    returns the front matter at the top of a page given line by line and an iterator over the
+    lines after it. Lines only count as front matter when the first is ---, a later --- closes
+    them and every one in between is a "key: value" pair, a blank line or a # comment. Anything
+    else is markdown (a page may well start with a --- rule), every line comes back and the
+    front matter is empty.
+    """
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return {}, lines
+    if first.rstrip("\n") != FRONT_MATTER_DELIMITER:
+        return {}, itertools.chain([first], lines)
+    read = [first]
+    for line in lines:
+        read.append(line)
+        if line.rstrip() == FRONT_MATTER_DELIMITER:
+            return parse_front_matter(read[1:-1]), lines
+        if not is_front_matter_line(line):
+            break
+    return {}, itertools.chain(read, lines)
+
+
+def split_front_matter(markdown: str) -> tuple[dict, str]:
+    """
+    returns the front matter between two --- lines at the very top of a page and the markdown
+    after it. Pages without front matter come back unchanged with an empty dict.
+    """
+    if not markdown.startswith(FRONT_MATTER_DELIMITER + "\n"):
+        return {}, markdown
+    front_matter, lines = read_front_matter(markdown.split("\n"))
+    return front_matter, "\n".join(lines)
+
+
+def skip_front_matter(lines):
+    """
+    yields the lines of a page after its front matter, for pages read line by line
+    """
+    front_matter, lines = read_front_matter(lines)
+    yield from lines
+
+
+def read_metadata(path: str) -> dict:
+    """
+    reads a page's front matter and title without parsing the rest of it: the file is read
+    line by line and closed as soon as both are known.
+
+    The title is the front matter's title, or else the first header (same as extract_title),
+    or None when the page has neither.
+    """
+    with open(path, "r") as markdown_file:
+        metadata, lines = read_front_matter(markdown_file)
+        if "title" not in metadata:
+            metadata["title"] = None
+            for line in lines:
+                if line.startswith("#"):
+                    metadata["title"] = line.strip("#").strip()
+                    break
+    return metadata
+
+
+class MetadataIndex():
+    """
+    the metadata of every page under a content directory, kept on disk so listing pages and
+    sitemaps don't have to open thousands of files. A page is only read again when its size
+    or mtime changed.
+
+    pages - maps a markdown source path to a dict with the keys:\n
+    signature - [size, mtime] of the source when it was read\n
+    metadata - what read_metadata returned for it
+    """
+    def __init__(self, path: str, pages: dict[str, dict] = None) -> None:
+        self.path = path
+        self.pages = pages if pages is not None else {}
+
+    @classmethod
+    def load(cls, path: str) -> "MetadataIndex":
+        # A missing or unreadable index is rebuilt from the sources
+        try:
+            with open(path, "r") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return cls(path)
+        if not isinstance(data, dict) or data.get("version") != METADATA_INDEX_VERSION:
+            return cls(path)
+        return cls(path, data.get("pages", {}))
+
+    def save(self) -> None:
+        write_json(self.path, {"version": METADATA_INDEX_VERSION, "pages": self.pages})
+
+    def refresh(self, content_dir: str) -> int:
+        """
+        brings the index up to date with content_dir and returns how many pages were read
+        """
+        pages = {}
+        read = 0
+        for root, dirs, files in os.walk(content_dir):
+            for file_item in files:
+                if not file_item.endswith(".md"):
+                    continue
+                source = os.path.join(root, file_item)
+                signature = file_signature(source)
+                entry = self.pages.get(source)
+                if entry is None or entry["signature"] != signature:
+                    entry = {"signature": signature, "metadata": read_metadata(source)}
+                    read += 1
+                pages[source] = entry
+        self.pages = pages
+        return read
+
+    def query(self, under: str = None, sort_by: str = None, reverse: bool = False, **equals) -> list[tuple[str, dict]]:
+        """
+        returns (source, metadata) pairs, optionally only the pages inside the directory under,
+        whose metadata has the given values, sorted by a metadata key (pages missing it last)
+        """
+        results = []
+        for source, entry in sorted(self.pages.items()):
+            metadata = entry["metadata"]
+            if under is not None and not os.path.abspath(source).startswith(os.path.abspath(under) + os.sep):
+                continue
+            if any(metadata.get(key) != value for key, value in equals.items()):
+                continue
+            results.append((source, metadata))
+        if sort_by is not None:
+            present = [result for result in results if result[1].get(sort_by) is not None]
+            missing = [result for result in results if result[1].get(sort_by) is None]
+            results = sorted(present, key=lambda result: result[1][sort_by], reverse=reverse) + missing
+        return results
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="List page titles and front matter without rendering anything.")
+    parser.add_argument("--content", default="./content", help="markdown source directory")
+    parser.add_argument("--index", default="./.build/metadata.json", help="metadata index kept between runs")
+    parser.add_argument("--under", default=None, help="only pages inside this directory")
+    parser.add_argument("--sort-by", default=None, help="metadata key to sort by, e.g. date")
+    parser.add_argument("--reverse", action="store_true", help="sort in descending order")
+    parser.add_argument("--json", action="store_true", help="print the metadata as json")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] = None) -> None:
+    args = parse_args(argv)
+    index = MetadataIndex.load(args.index)
+    index.refresh(args.content)
+    index.save()
+    results = index.query(args.under, args.sort_by, args.reverse)
+    if args.json:
+        print(json.dumps(dict(results), indent=1))
+        return
+    for source, metadata in results:
+        print(f"{source}: {metadata['title']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+from manifest import hash_file
+import hashlib
+import os
+
+
+class OutputWriter():
+    """
+    a text file to render a page into, used like open(dest_path, "w"). The page goes to a
+    temporary file next to dest_path and only replaces it when the content differs, so unchanged
+    pages keep their mtime (rsync and other deploy tools skip them) and a server reading
+    dest_path sees either the old page or the new one, never half of one.
+
+    Whether the content differs is decided by previous_hash, the sha256 the build manifest
+    recorded for the output, or else by hashing the existing file when its size matches.
+
+    digest - sha256 of what was written, once closed\n
+    changed - whether dest_path was replaced, once closed\n
+    existed - whether dest_path was there before, once closed
+    """
+    def __init__(self, dest_path: str, previous_hash: str = None) -> None:
+        self.dest_path = dest_path
+        self.previous_hash = previous_hash
+        self.tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+        self.hash = hashlib.sha256()
+        self.size = 0
+        self.digest = None
+        self.changed = None
+        self.existed = None
+        if os.path.dirname(dest_path):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        # Bytes are written as utf-8 whatever the locale, the same page always makes the same file
+        self.file = open(self.tmp_path, "wb")
+
+    def write(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self.hash.update(data)
+        self.size += len(data)
+        self.file.write(data)
+
+    def writelines(self, fragments) -> None:
+        for fragment in fragments:
+            self.write(fragment)
+
+    def is_unchanged(self) -> bool:
+        try:
+            existing_size = os.path.getsize(self.dest_path)
+        except OSError:
+            self.existed = False
+            return False
+        self.existed = True
+        if existing_size != self.size:
+            return False
+        if self.previous_hash is not None:
+            return self.previous_hash == self.digest
+        return hash_file(self.dest_path) == self.digest
+
+    def close(self) -> bool:
+        """
+        puts the page in place unless it is unchanged and returns whether it did
+        """
+        self.file.close()
+        self.digest = self.hash.hexdigest()
+        self.changed = not self.is_unchanged()
+        if self.changed:
+            os.replace(self.tmp_path, self.dest_path)
+        else:
+            os.unlink(self.tmp_path)
+        return self.changed
+
+    def discard(self) -> None:
+        # A page that failed half way leaves the previous output untouched
+        self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.unlink(self.tmp_path)
+
+    def __enter__(self) -> "OutputWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+def write_output_if_changed(dest_path: str, text: str, previous_hash: str = None) -> OutputWriter:
+    with OutputWriter(dest_path, previous_hash) as file:
+        file.write(text)
+    return file
@@ -0,0 +1,140 @@
+from manifest import BuildManifest, file_signature
+from deploy_report import DeployReport
+from static_sync import prune_empty_dirs
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+import os
+
+# brotli is optional, without it only .gz files are written
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Files a static server would send compressed, images and fonts are compressed already
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".map")
+
+
+def compression_formats() -> list[str]:
+    formats = [".gz"]
+    if brotli is not None:
+        formats.append(".br")
+    return formats
+
+
+def compress_bytes(data: bytes, compression_format: str) -> bytes:
+    if compression_format == ".gz":
+        # mtime=0 keeps the output identical between builds
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if compression_format == ".br":
+        return brotli.compress(data, quality=11)
+    raise ValueError(f"unknown compression format: {compression_format}")
+
+
+def read_bytes(path: str) -> bytes:
+    try:
+        with open(path, "rb") as file:
+            return file.read()
+    except OSError:
+        return None
+
+
+def compress_file(path: str, formats: list[str]) -> list[str]:
+    """
+    writes a compressed sibling (index.html.gz, index.html.br) of path for every format and returns
+    the siblings whose content changed. Each one appears atomically with the mtime of path, so a
+    server never sends a half written or stale file. A sibling that would come out the same, e.g.
+    after path was only touched, just gets the new mtime.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    stat = os.stat(path)
+    changed = []
+    for compression_format in formats:
+        destination = path + compression_format
+        compressed = compress_bytes(data, compression_format)
+        if read_bytes(destination) == compressed:
+            os.utime(destination, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            continue
+        changed.append(destination)
+        tmp_path = f"{destination}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as file:
+                file.write(compressed)
+            os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            os.replace(tmp_path, destination)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+    return changed
+
+
+def compressed_is_current(path: str, entry: dict, formats: list[str]) -> bool:
+    if entry is None or entry.get("signature") != file_signature(path) or entry.get("formats") != formats:
+        return False
+    return all(os.path.exists(path + compression_format) for compression_format in formats)
+
+
+def remove_compressed(path: str, root: str, report: DeployReport = None) -> None:
+    for compression_format in (".gz", ".br"):
+        if os.path.exists(path + compression_format):
+            os.unlink(path + compression_format)
+            if report is not None:
+                report.record_removal(path + compression_format)
+    prune_empty_dirs(path, root)
+
+
+def precompress_outputs(output_dir: str, manifest: BuildManifest, jobs: int = 1, report: DeployReport = None) -> dict[str, int]:
+    """
+    writes .gz (and .br, when brotli is installed) siblings of every compressible page and static
+    file the manifest knows about in output_dir.
+
+    manifest.compressed remembers the size and mtime each file had when it was compressed, so
+    files that haven't changed since are skipped. Siblings of files that are gone are removed.
+    report, if given, records every sibling written or removed.
+    """
+    formats = compression_formats()
+    outputs = [entry["output"] for entry in manifest.pages.values()] + list(manifest.static.values())
+    outputs = sorted(set(path for path in outputs if path.endswith(COMPRESSIBLE_EXTENSIONS) and os.path.exists(path)))
+
+    counts = {"compressed": 0, "unchanged": 0, "removed": 0}
+    pending = []
+    for path in outputs:
+        if compressed_is_current(path, manifest.compressed.get(path), formats):
+            counts["unchanged"] += 1
+        else:
+            pending.append(path)
+
+    existed = {path + compression_format: os.path.exists(path + compression_format) for path in pending for compression_format in formats}
+    # zlib and brotli release the GIL while compressing, threads are enough to use every core
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        changed = [sibling for siblings in executor.map(lambda path: compress_file(path, formats), pending) for sibling in siblings]
+    counts["compressed"] = len(pending)
+    if report is not None:
+        # Siblings rewritten with the same bytes don't need uploading or purging again
+        for path in changed:
+            report.record_write(path, existed[path])
+
+    current = set(os.path.abspath(path) for path in outputs)
+    for path in sorted(set(manifest.compressed) - set(outputs)):
+        # The same output under another spelling of the output directory
+        if os.path.abspath(path) in current:
+            continue
+        remove_compressed(path, output_dir, report)
+        counts["removed"] += 1
+    manifest.compressed = {path: {"signature": file_signature(path), "formats": formats} for path in outputs}
+    return counts
+
+
+def remove_precompressed(output_dir: str, manifest: BuildManifest, report: DeployReport = None) -> int:
+    """
+    removes every sibling precompress_outputs wrote, for builds without precompression: the pages
+    they rewrite would otherwise be served from stale .gz and .br files. Returns how many outputs
+    had theirs removed.
+    """
+    removed = 0
+    for path in sorted(manifest.compressed):
+        remove_compressed(path, output_dir, report)
+        removed += 1
+    manifest.compressed = {}
+    return removed
@@ -0,0 +1,116 @@
+from contextlib import contextmanager, nullcontext
+import json
+import os
+import sys
+import time
+
+
+class Profiler():
+    """
+    records wall time and allocations for each stage of each page in a build.
+
+    Every record is a dict with:\n
+    page - the markdown source, or None for build-wide stages like copying static files\n
+    stage - the stage name ("read", "parse", "render", ...)\n
+    start, duration - perf_counter seconds\n
+    allocations - change in the number of memory blocks allocated by the interpreter\n
+    pid - the process that ran the stage, pages rendered by pool workers report their own
+    """
+    enabled = True
+
+    def __init__(self) -> None:
+        self.records = []
+
+    @contextmanager
+    def stage(self, page: str, name: str):
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.records.append({
+                "page": page,
+                "stage": name,
+                "start": start,
+                "duration": time.perf_counter() - start,
+                "allocations": sys.getallocatedblocks() - blocks,
+                "pid": os.getpid(),
+            })
+
+    def merge(self, records: list[dict]) -> None:
+        self.records.extend(records)
+
+    def page_totals(self) -> dict[str, float]:
+        totals = {}
+        for record in self.records:
+            if record["page"] is not None:
+                totals[record["page"]] = totals.get(record["page"], 0.0) + record["duration"]
+        return totals
+
+    def stage_totals(self) -> dict[str, dict]:
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record["stage"], {"count": 0, "duration": 0.0, "max": 0.0, "allocations": 0})
+            total["count"] += 1
+            total["duration"] += record["duration"]
+            total["max"] = max(total["max"], record["duration"])
+            total["allocations"] += record["allocations"]
+        return totals
+
+    def summary(self, top: int = 10) -> str:
+        lines = ["Slowest stages:"]
+        lines.append(f"  {'stage':<16}{'count':>8}{'total (ms)':>14}{'mean (ms)':>12}{'max (ms)':>12}{'allocations':>14}")
+        stages = sorted(self.stage_totals().items(), key=lambda item: item[1]["duration"], reverse=True)
+        for name, total in stages:
+            lines.append(
+                f"  {name:<16}{total['count']:>8}{total['duration'] * 1000:>14.2f}"
+                f"{total['duration'] * 1000 / total['count']:>12.3f}{total['max'] * 1000:>12.3f}{total['allocations']:>14}"
+            )
+
+        lines.append("Slowest pages:")
+        pages = sorted(self.page_totals().items(), key=lambda item: item[1], reverse=True)
+        for page, duration in pages[:top]:
+            lines.append(f"  {duration * 1000:>10.2f} ms  {page}")
+        return "\n".join(lines)
+
+    def write_trace(self, path: str) -> None:
+        """
+        writes the records in Chrome trace event format, open it in chrome://tracing or Perfetto
+        """
+        if not self.records:
+            events = []
+        else:
+            origin = min(record["start"] for record in self.records)
+            events = [
+                {
+                    "name": record["stage"],
+                    "cat": "build",
+                    "ph": "X",
+                    "ts": (record["start"] - origin) * 1e6,
+                    "dur": record["duration"] * 1e6,
+                    "pid": record["pid"],
+                    "tid": record["pid"],
+                    "args": {"page": record["page"], "allocations": record["allocations"]},
+                }
+                for record in self.records
+            ]
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+NULL_STAGE = nullcontext()
+
+class NullProfiler():
+    """
+    stands in for Profiler when profiling is off, so stages cost nothing
+    """
+    enabled = False
+    records = []
+
+    def stage(self, page: str, name: str):
+        return NULL_STAGE
+
+    def merge(self, records: list[dict]) -> None:
+        pass
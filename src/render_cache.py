@@ -0,0 +1,137 @@
+import fingerprint
+import responsive_images
+import template
+from ast_cache import PARSER_VERSION
+from block_markdown import markdown_to_blocks, block_to_html_node
+from htmlnode import LeafNode, ParentNode
+from manifest import hash_bytes, hash_file, write_json
+from collections import OrderedDict
+import hashlib
+import json
+import os
+
+# Bump when the cache file layout changes, parser and renderer changes are picked up from the sources
+RENDER_CACHE_VERSION = 1
+
+
+def render_version() -> str:
+    """
+    the parser version (see ast_cache.py) combined with a hash of the modules whose transforms
+    run before a block's html is cached, so a saved cache never serves html the current code
+    would no longer render
+    """
+    digest = [str(RENDER_CACHE_VERSION), PARSER_VERSION]
+    for module in (template, responsive_images, fingerprint):
+        digest.append(hash_file(module.__file__))
+    return hash_bytes(" ".join(digest).encode())
+
+RENDER_VERSION = render_version()
+
+
+class BlockRenderCache():
+    """
+    size-bounded LRU cache of rendered block html, keyed by a hash of the block's markdown.
+    Pages sharing boilerplate (disclaimers, footers, repeated code samples) render it once.
+
+    max_entries - entries kept before the least recently used one is evicted\n
+    path - optional file the cache is loaded from and saved to between builds
+    """
+    def __init__(self, max_entries: int = 10000, path: str = None) -> None:
+        self.max_entries = max_entries
+        self.path = path
+        self.entries = OrderedDict()
+        self.new_entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(block: str, base_path: str) -> str:
+        # The cached html already has links rewritten, so the base path is part of the key
+        return hashlib.sha1(f"{RENDER_VERSION}\0{base_path}\0{block}".encode()).hexdigest()
+
+    def get(self, key: str) -> str:
+        html = self.entries.get(key)
+        if html is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return html
+
+    def put(self, key: str, html: str) -> None:
+        self.entries[key] = html
+        self.entries.move_to_end(key)
+        if self.path is not None:
+            self.new_entries[key] = html
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def drain_new_entries(self) -> dict[str, str]:
+        """
+        returns and forgets the entries added since the last call, pool workers send these
+        back to the main process so they end up in the saved cache
+        """
+        entries = self.new_entries
+        self.new_entries = {}
+        return entries
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def load(self) -> None:
+        # A missing, corrupt or outdated cache file just starts the cache empty
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "r") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != RENDER_VERSION:
+            return
+        for key, html in data.get("entries", [])[-self.max_entries:]:
+            self.entries[key] = html
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        write_json(self.path, {"version": RENDER_VERSION, "entries": list(self.entries.items())}, indent=None)
+
+
+def cache_summary(stats: dict[str, int], entries: int) -> str:
+    lookups = stats["hits"] + stats["misses"]
+    rate = stats["hits"] / lookups * 100 if lookups else 0.0
+    return f"Block cache: {stats['hits']} hits, {stats['misses']} misses ({rate:.1f}% hit rate), {stats['evictions']} evictions, {entries} entries"
+
+
+def cached_markdown_to_html_node(markdown: str, cache: BlockRenderCache, base_path: str, transform=None) -> ParentNode:
+    """
+    like markdown_to_html_node, but blocks found in the cache are not parsed at all. Cached
+    blocks come back as raw html leaves. transform is applied to freshly parsed blocks before
+    they are rendered and cached, it has to depend on nothing but the block and base_path.
+    """
+    children = []
+    for block in markdown_to_blocks(markdown):
+        key = cache.key(block, base_path)
+        html = cache.get(key)
+        if html is None:
+            html_node = block_to_html_node(block)
+            if transform is not None:
+                transform(html_node)
+            html = html_node.to_html()
+            cache.put(key, html)
+        children.append(LeafNode(None, html))
+    return ParentNode("div", children, None)
+
+
+# One cache per process, so every page a pool worker renders shares it
+process_cache = None
+
+def get_process_cache(max_entries: int, path: str = None) -> BlockRenderCache:
+    global process_cache
+    if process_cache is None or process_cache.max_entries != max_entries or process_cache.path != path:
+        process_cache = BlockRenderCache(max_entries, path)
+        process_cache.load()
+    return process_cache
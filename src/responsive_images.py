@@ -0,0 +1,255 @@
+from htmlnode import HTMLNode
+from deploy_report import DeployReport
+from manifest import hash_bytes, hash_file, write_json
+from static_sync import place_file, file_is_current, prune_empty_dirs
+import json
+import os
+import struct
+
+# Pillow is optional, without it images keep their single size but still get width, height
+# and lazy loading from their headers
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+IMAGE_INDEX_VERSION = 1
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+VARIANT_WIDTHS = (480, 960, 1440)
+
+
+def png_size(header: bytes) -> tuple[int, int]:
+    if header[:8] == b"\x89PNG\r\n\x1a\n" and header[12:16] == b"IHDR":
+        return struct.unpack(">II", header[16:24])
+    return None
+
+def gif_size(header: bytes) -> tuple[int, int]:
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return struct.unpack("<HH", header[6:10])
+    return None
+
+def webp_size(header: bytes) -> tuple[int, int]:
+    if header[:4] != b"RIFF" or header[8:12] != b"WEBP":
+        return None
+    chunk = header[12:16]
+    if chunk == b"VP8 " and len(header) >= 30:
+        width, height = struct.unpack("<HH", header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(header) >= 25:
+        bits = int.from_bytes(header[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(header) >= 30:
+        return int.from_bytes(header[24:27], "little") + 1, int.from_bytes(header[27:30], "little") + 1
+    return None
+
+def jpeg_size(file) -> tuple[int, int]:
+    # Walk the markers up to the first start of frame, which holds the size
+    if file.read(2) != b"\xff\xd8":
+        return None
+    while True:
+        marker = file.read(2)
+        if len(marker) != 2 or marker[0] != 0xFF:
+            return None
+        if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:
+            continue
+        length = file.read(2)
+        if len(length) != 2:
+            return None
+        segment_length = struct.unpack(">H", length)[0]
+        if marker[1] in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+            frame = file.read(5)
+            if len(frame) != 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return width, height
+        file.seek(segment_length - 2, os.SEEK_CUR)
+
+def image_size(path: str) -> tuple[int, int]:
+    """
+    returns (width, height) read from the header of a png, gif, webp or jpeg file, or None
+    when the format isn't recognised. Only the first few bytes are read.
+    """
+    with open(path, "rb") as file:
+        header = file.read(32)
+        for size in (png_size, gif_size, webp_size):
+            found = size(header)
+            if found is not None:
+                return found
+        file.seek(0)
+        return jpeg_size(file)
+
+
+def variant_name(rel_path: str, width: int) -> str:
+    """
+    images/elf.png at 480 pixels wide is images/elf-480w.png
+    """
+    root, extension = os.path.splitext(rel_path)
+    return f"{root}-{width}w{extension}"
+
+def write_variant(source: str, destination: str, width: int) -> None:
+    with Image.open(source) as image:
+        height = round(image.height * width / image.width)
+        resized = image.resize((width, height), Image.LANCZOS)
+        options = {"optimize": True}
+        if image.format == "JPEG":
+            options["quality"] = 82
+            options["progressive"] = True
+        tmp_path = f"{destination}.{os.getpid()}.tmp{os.path.splitext(destination)[1]}"
+        try:
+            resized.save(tmp_path, image.format, **options)
+            os.replace(tmp_path, destination)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+
+class ImagePipeline():
+    """
+    measures every image in the static directory and, when Pillow is installed, writes
+    narrower copies of it for srcset.
+
+    Variants are kept in cache_dir named by the hash of their source, so an image is only
+    resized once however often it is renamed or the output is wiped. The index remembers each
+    image's size, mtime and hash so unchanged images aren't even hashed again.
+
+    widths - the variant widths, images narrower than one of them don't get that variant
+    """
+    def __init__(self, static_dir: str, output_dir: str, cache_dir: str, widths: tuple[int] = VARIANT_WIDTHS) -> None:
+        self.static_dir = static_dir
+        self.output_dir = output_dir
+        self.cache_dir = cache_dir
+        self.widths = sorted(widths)
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.images = {}
+
+    def load(self) -> None:
+        try:
+            with open(self.index_path, "r") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == IMAGE_INDEX_VERSION:
+            self.images = data.get("images", {})
+
+    def save(self) -> None:
+        write_json(self.index_path, {"version": IMAGE_INDEX_VERSION, "images": self.images})
+
+    def cached_variant(self, entry: dict, rel_path: str, width: int) -> str:
+        return os.path.join(self.cache_dir, f"{entry['hash']}-{width}w{os.path.splitext(rel_path)[1].lower()}")
+
+    def measure(self, source: str, rel_path: str) -> dict:
+        stat = os.stat(source)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        entry = self.images.get(rel_path)
+        # Installing Pillow later has to produce the variants that were skipped without it
+        resized = Image is not None
+        if entry is not None and entry["signature"] == signature and entry["widths"] == self.widths and entry["resized"] == resized:
+            if all(os.path.exists(self.cached_variant(entry, rel_path, width)) for width in entry["variants"]):
+                return entry
+
+        size = image_size(source)
+        if size is None:
+            return None
+        digest = hash_file(source)
+        entry = {"signature": signature, "hash": digest, "width": size[0], "height": size[1], "widths": self.widths, "resized": resized, "variants": []}
+        if resized:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for width in self.widths:
+                if width >= size[0]:
+                    break
+                cached = self.cached_variant(entry, rel_path, width)
+                if not os.path.exists(cached):
+                    write_variant(source, cached, width)
+                entry["variants"].append(width)
+        return entry
+
+    def run(self, place: bool = True, report: DeployReport = None) -> dict[str, int]:
+        """
+        measures every image, places its variants next to its copy in the output directory and
+        removes variants of images that are gone. With place=False images are only measured.
+        report, if given, records the variants placed or removed.
+        """
+        counts = {"images": 0, "variants": 0}
+        images = {}
+        placed = set()
+        if os.path.exists(self.static_dir):
+            for root, dirs, files in os.walk(self.static_dir):
+                dirs.sort()
+                for file_item in sorted(files):
+                    if not file_item.lower().endswith(IMAGE_EXTENSIONS):
+                        continue
+                    source = os.path.join(root, file_item)
+                    rel_path = os.path.relpath(source, self.static_dir)
+                    entry = self.measure(source, rel_path)
+                    if entry is None:
+                        continue
+                    images[rel_path] = entry
+                    counts["images"] += 1
+                    if not place:
+                        continue
+                    for width in entry["variants"]:
+                        cached = self.cached_variant(entry, rel_path, width)
+                        destination = os.path.join(self.output_dir, variant_name(rel_path, width))
+                        if not file_is_current(cached, destination):
+                            existed = os.path.exists(destination)
+                            place_file(cached, destination)
+                            if report is not None:
+                                report.record_write(destination, existed)
+                        placed.add(variant_name(rel_path, width))
+                        counts["variants"] += 1
+
+        for rel_path, entry in self.images.items():
+            if not place:
+                break
+            for width in entry["variants"]:
+                name = variant_name(rel_path, width)
+                destination = os.path.join(self.output_dir, name)
+                if name not in placed and os.path.exists(destination):
+                    os.unlink(destination)
+                    prune_empty_dirs(destination, self.output_dir)
+                    if report is not None:
+                        report.record_removal(destination)
+        self.images = images
+        return counts
+
+    def attributes(self) -> dict:
+        """
+        what generate_page needs to fill in image tags, in a form that can be sent to pool workers:
+
+        widths - the configured variant widths, a change re-renders every page\n
+        digest - changes whenever any image's attributes do\n
+        attributes - maps the root-relative url of every image to its width, height and variants
+        """
+        attributes = {}
+        for rel_path, entry in self.images.items():
+            url = "/" + rel_path.replace(os.sep, "/")
+            attributes[url] = {"width": entry["width"], "height": entry["height"], "variants": entry["variants"]}
+        digest = hash_bytes(json.dumps(attributes, sort_keys=True).encode())
+        return {"widths": self.widths, "digest": digest, "attributes": attributes}
+
+
+def set_image_attributes(node: HTMLNode, images: dict) -> HTMLNode:
+    """
+    adds width, height, loading="lazy" and, for images with variants, srcset and sizes to every
+    img in the tree whose src is a known image. Runs before rebase_node_urls, which rewrites the
+    srcset urls along with src.
+    """
+    attributes = images["attributes"]
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.tag == "img" and current.props and current.props.get("src") in attributes:
+            url = current.props["src"]
+            image = attributes[url]
+            current.props["width"] = str(image["width"])
+            current.props["height"] = str(image["height"])
+            current.props["loading"] = "lazy"
+            if image["variants"]:
+                root, extension = os.path.splitext(url)
+                candidates = [f"{root}-{width}w{extension} {width}w" for width in image["variants"]]
+                candidates.append(f"{url} {image['width']}w")
+                current.props["srcset"] = ", ".join(candidates)
+                current.props["sizes"] = f"(max-width: {image['width']}px) 100vw, {image['width']}px"
+        if current.children:
+            stack.extend(current.children)
+    return node
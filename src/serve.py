@@ -0,0 +1,160 @@
+from main import generate_page, generate_pages_recursively, page_dest_path, remove_output, PageGenerationError
+from manifest import BuildManifest, hash_file
+from template import Template
+from static_sync import sync_static, place_file
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+import argparse
+import functools
+import os
+import threading
+import time
+
+
+def is_within(path: str, directory: str) -> bool:
+    return os.path.abspath(path).startswith(os.path.abspath(directory) + os.sep)
+
+
+class Watcher():
+    """
+    polls files and directories for changes by comparing mtime and size between scans,
+    so no platform specific file notification library is needed
+    """
+    def __init__(self, paths: list[str]) -> None:
+        self.paths = paths
+        self.snapshot = self.scan()
+
+    def scan(self) -> dict[str, tuple[int, int]]:
+        snapshot = {}
+        for path in self.paths:
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+                continue
+            for root, dirs, files in os.walk(path):
+                for file_item in files:
+                    file_path = os.path.join(root, file_item)
+                    try:
+                        stat = os.stat(file_path)
+                    except FileNotFoundError:
+                        # Deleted between listing the directory and looking at the file
+                        continue
+                    snapshot[file_path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self) -> tuple[list[str], list[str]]:
+        """
+        returns the (changed or added, removed) files since the last poll
+        """
+        snapshot = self.scan()
+        changed = sorted(path for path, stat in snapshot.items() if self.snapshot.get(path) != stat)
+        removed = sorted(path for path in self.snapshot if path not in snapshot)
+        self.snapshot = snapshot
+        return changed, removed
+
+
+class SiteRebuilder():
+    """
+    applies changes of source files to the output directory, touching only what they affect:
+    a markdown change renders that one page, a static file change copies that one file and
+    only a template change renders every page again
+    """
+    def __init__(self, content_dir: str, static_dir: str, template_path: str, output_dir: str, base_path: str, manifest: BuildManifest) -> None:
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.output_dir = output_dir
+        self.base_path = base_path
+        self.manifest = manifest
+        self.template = Template.load(template_path, base_path)
+
+    def build(self) -> None:
+        sync_static(self.static_dir, self.output_dir, self.manifest)
+        self.render_all()
+
+    def render_all(self) -> None:
+        try:
+            generate_pages_recursively(self.content_dir, self.template_path, self.output_dir, self.base_path, self.manifest)
+        except PageGenerationError as e:
+            print(e)
+        self.manifest.save()
+
+    def render_page(self, file_path: str) -> None:
+        dest_path = page_dest_path(file_path, self.content_dir, self.output_dir)
+        try:
+            generate_page(file_path, self.template, dest_path, self.base_path)
+        except Exception as e:
+            # Keep serving, the next save of the file gets another try
+            print(f"Failed to generate {file_path}: {type(e).__name__}: {e}")
+            self.manifest.remove(file_path)
+            return
+        self.manifest.record(file_path, hash_file(file_path), self.template.digest, self.base_path, dest_path)
+
+    def apply(self, changed: list[str], removed: list[str]) -> None:
+        if self.template_path in changed:
+            print(f"Template {self.template_path} changed, regenerating every page...")
+            self.template = Template.load(self.template_path, self.base_path)
+            self.render_all()
+            changed = [path for path in changed if not is_within(path, self.content_dir)]
+
+        for path in changed:
+            if is_within(path, self.content_dir) and path.endswith(".md"):
+                self.render_page(path)
+            elif is_within(path, self.static_dir):
+                rel_path = os.path.relpath(path, self.static_dir)
+                dest_path = os.path.join(self.output_dir, rel_path)
+                print(f"Copying {path} to {dest_path}...")
+                place_file(path, dest_path)
+                self.manifest.static[rel_path] = os.path.normpath(dest_path)
+
+        for path in removed:
+            if is_within(path, self.content_dir) and path.endswith(".md"):
+                entry = self.manifest.remove(path)
+                remove_output(entry["output"] if entry else page_dest_path(path, self.content_dir, self.output_dir), self.output_dir)
+            elif is_within(path, self.static_dir):
+                rel_path = os.path.relpath(path, self.static_dir)
+                self.manifest.static.pop(rel_path, None)
+                remove_output(os.path.join(self.output_dir, rel_path), self.output_dir)
+
+        self.manifest.save()
+
+
+def serve_forever(output_dir: str, port: int) -> ThreadingHTTPServer:
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=output_dir)
+    server = ThreadingHTTPServer(("", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the site, serve it and rebuild whatever changes.")
+    parser.add_argument("base_path", nargs="?", default="/", help="path prefix for root-relative links (default: /)")
+    parser.add_argument("--port", type=int, default=8888, help="port to serve on")
+    parser.add_argument("--interval", type=float, default=0.2, help="seconds between checks for changed files")
+    parser.add_argument("--content", default="./content", help="markdown source directory")
+    parser.add_argument("--static", default="./static", help="static asset directory")
+    parser.add_argument("--template", default="./template.html", help="html template")
+    parser.add_argument("--output", default="./docs", help="output directory")
+    parser.add_argument("--manifest", default="./.build/manifest.json", help="build manifest used for incremental builds")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] = None) -> None:
+    args = parse_args(argv)
+    rebuilder = SiteRebuilder(args.content, args.static, args.template, args.output, args.base_path, BuildManifest.load(args.manifest))
+    rebuilder.build()
+
+    watcher = Watcher([args.content, args.static, args.template])
+    server = serve_forever(args.output, args.port)
+    print(f"Serving {args.output} at http://localhost:{args.port}, watching for changes...")
+    try:
+        while True:
+            time.sleep(args.interval)
+            changed, removed = watcher.poll()
+            if changed or removed:
+                rebuilder.apply(changed, removed)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+from main import SHARD_BUILD_DIR, page_dest_path, remove_output, parse_widths
+from manifest import BuildManifest
+from dependency_graph import DependencyGraph
+from metadata import MetadataIndex
+from precompress import precompress_outputs, remove_precompressed
+from deploy_report import DeployReport
+from fingerprint import fingerprint_assets, asset_urls, write_asset_manifest, remove_asset_manifest
+from responsive_images import ImagePipeline, VARIANT_WIDTHS
+from static_sync import sync_static, place_file, file_is_current, LINK_MODES
+import argparse
+import os
+import subprocess
+import sys
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+def check_shards(shard_dirs: list[str], shard_manifests: list[BuildManifest]) -> None:
+    """
+    raises ValueError unless the shard directories hold shards 1 to N of one split, each once.
+    A missing shard would look like deleted pages and have them removed from the output.
+    """
+    counts = set()
+    indexes = []
+    for shard_dir, shard_manifest in zip(shard_dirs, shard_manifests):
+        if shard_manifest.shard is None:
+            raise ValueError(f"{shard_dir} is not the output of a main.py --shard build")
+        index, count = shard_manifest.shard
+        counts.add(count)
+        indexes.append(index)
+    if len(counts) > 1:
+        raise ValueError(f"the shards come from different splits ({', '.join(map(str, sorted(counts)))} shards)")
+    count = counts.pop()
+    if sorted(indexes) != list(range(1, count + 1)):
+        missing = sorted(set(range(1, count + 1)) - set(indexes))
+        duplicated = sorted(set(index for index in indexes if indexes.count(index) > 1))
+        problems = [f"shard {index} is missing" for index in missing] + [f"shard {index} is given more than once" for index in duplicated]
+        raise ValueError(f"expected shards 1 to {count}: {', '.join(problems)}")
+
+
+def merge_shards(shard_dirs: list[str], content_dir: str, output_dir: str, manifest: BuildManifest, graph: DependencyGraph = None, link_mode: str = "copy", report: DeployReport = None) -> dict[str, int]:
+    """
+    copies the pages each shard rendered (main.py --shard) into output_dir and replaces the
+    pages in manifest, and in graph if given, with the ones recorded by the shards.
+
+    Only pages whose copy in output_dir differs are copied. Pages the manifest had but no
+    shard rendered are removed from output_dir, same as a build removes deleted pages, unless
+    their source is still there. Raises ValueError unless every shard of one split is given.
+    Static files are left to sync_static. report, if given, records the pages copied and removed.
+    """
+    counts = {"copied": 0, "unchanged": 0, "removed": 0}
+    pages = {}
+    graph_pages = {}
+    shard_manifests = [BuildManifest.load(os.path.join(shard_dir, SHARD_BUILD_DIR, "manifest.json")) for shard_dir in shard_dirs]
+    check_shards(shard_dirs, shard_manifests)
+    for shard_dir, shard_manifest in zip(shard_dirs, shard_manifests):
+        for source, entry in sorted(shard_manifest.pages.items()):
+            if source in pages:
+                raise ValueError(f"{source} was rendered by more than one shard")
+            # Outputs are found from the source, the shard directory may have moved since it was built
+            shard_path = page_dest_path(source, content_dir, shard_dir)
+            dest_path = page_dest_path(source, content_dir, output_dir)
+            if file_is_current(shard_path, dest_path):
+                counts["unchanged"] += 1
+            else:
+                print(f"Copying {shard_path} to {dest_path}...")
+                existed = os.path.exists(dest_path)
+                place_file(shard_path, dest_path, link_mode)
+                if report is not None:
+                    report.record_write(dest_path, existed, entry.get("output_hash"))
+                counts["copied"] += 1
+            pages[source] = dict(entry, output=dest_path)
+        if graph is not None:
+            graph_pages.update(DependencyGraph.load(os.path.join(shard_dir, SHARD_BUILD_DIR, "graph.json")).pages)
+
+    seen_outputs = set(os.path.abspath(entry["output"]) for entry in pages.values())
+    for source in sorted(set(manifest.pages) - set(pages)):
+        if os.path.exists(source):
+            # Rendered by none of the shards yet still there, the output is kept rather than guessed gone
+            print(f"Keeping {manifest.pages[source]['output']}, no shard rendered {source}")
+            pages[source] = manifest.pages[source]
+            if graph is not None and source in graph.pages:
+                graph_pages[source] = graph.pages[source]
+        elif os.path.abspath(manifest.pages[source]["output"]) not in seen_outputs:
+            remove_output(manifest.pages[source]["output"], output_dir, report)
+            counts["removed"] += 1
+    manifest.pages = pages
+    if graph is not None:
+        graph.pages = graph_pages
+    return counts
+
+
+def build_shards_locally(count: int, shards_dir: str, build_args: list[str], stdout=None) -> list[str]:
+    """
+    runs one main.py --shard process per shard side by side, standing in for CI workers, and
+    returns the shard output directories. stdout is passed on to subprocess.Popen.
+    """
+    shard_dirs = [os.path.join(shards_dir, str(index)) for index in range(1, count + 1)]
+    processes = [
+        subprocess.Popen([sys.executable, MAIN_SCRIPT, *build_args, "--shard", f"{index}/{count}", "--output", shard_dir], stdout=stdout)
+        for index, shard_dir in enumerate(shard_dirs, start=1)
+    ]
+    failed = [index for index, process in enumerate(processes, start=1) if process.wait() != 0]
+    if failed:
+        raise RuntimeError(f"shard(s) {', '.join(map(str, failed))} of {count} failed")
+    return shard_dirs
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Merge sharded builds into one output directory.")
+    parser.add_argument("--content", default="./content", help="markdown source directory the shards were built from")
+    parser.add_argument("--static", default="./static", help="static asset directory")
+    parser.add_argument("--output", default="./docs", help="output directory the shards are merged into")
+    parser.add_argument("--manifest", default="./.build/manifest.json", help="build manifest of the output directory")
+    parser.add_argument("--graph", default="./.build/graph.json", help="dependency graph of the output directory")
+    parser.add_argument("--link", choices=LINK_MODES, default="copy", help="how pages and static files are placed in the output directory")
+    parser.add_argument("--metadata-index", default="./.build/metadata.json", help="index of page titles and front matter, see metadata.py")
+    parser.add_argument("--deploy-report", default="./.build/deploy-report.json", help="where the list of outputs the merge added, modified and removed is written")
+    parser.add_argument("--precompress", action="store_true", help="write .gz (and .br) copies of the merged text outputs, see main.py --precompress")
+    parser.add_argument("--fingerprint", action="store_true", help="copy static files under their hashed names, for shards built with main.py --fingerprint")
+    parser.add_argument("--asset-manifest", default=None, help="where the map from asset urls to hashed urls is written (default: asset-manifest.json in the output directory)")
+    parser.add_argument("--responsive-images", action="store_true", help="place the resized image variants the shards' pages use, see main.py --responsive-images")
+    parser.add_argument("--image-widths", type=parse_widths, default=VARIANT_WIDTHS, help="widths the shards were built with (default: 480,960,1440)")
+    parser.add_argument("--image-cache", default="./.build/images", help="where resized image variants are kept between builds")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    merge = commands.add_parser("merge", help="merge shard output directories built with main.py --shard")
+    merge.add_argument("shard_dirs", nargs="+", help="shard output directories")
+
+    local = commands.add_parser("local", help="build every shard in its own local process, then merge them")
+    local.add_argument("count", type=int, help="number of shards")
+    local.add_argument("--shards-dir", default="./.build/shards", help="where the shard outputs are kept")
+    local.add_argument("build_args", nargs=argparse.REMAINDER, help="arguments for main.py, e.g. the base path")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] = None) -> None:
+    args = parse_args(argv)
+    if args.command == "local":
+        if args.count < 1:
+            sys.exit("the number of shards must be at least 1")
+        shard_dirs = build_shards_locally(args.count, args.shards_dir, ["--content", args.content, "--static", args.static, *args.build_args])
+    else:
+        shard_dirs = args.shard_dirs
+
+    manifest = BuildManifest.load(args.manifest)
+    graph = DependencyGraph.load(args.graph)
+    report = DeployReport(args.output)
+    try:
+        counts = merge_shards(shard_dirs, args.content, args.output, manifest, graph, args.link, report)
+    except ValueError as e:
+        sys.exit(f"Not merging: {e}")
+    names = fingerprint_assets(args.static) if args.fingerprint else None
+    sync_static(args.static, args.output, manifest, link_mode=args.link, names=names, report=report)
+    if args.fingerprint:
+        write_asset_manifest(args.asset_manifest or os.path.join(args.output, "asset-manifest.json"), asset_urls(names), report)
+    else:
+        remove_asset_manifest(args.asset_manifest or os.path.join(args.output, "asset-manifest.json"), report)
+    if args.responsive_images:
+        # Shards only measure images, their variants are placed once here like the static files
+        pipeline = ImagePipeline(args.static, args.output, args.image_cache, args.image_widths)
+        pipeline.load()
+        pipeline.run(report=report)
+        pipeline.save()
+    metadata_index = MetadataIndex.load(args.metadata_index)
+    metadata_index.refresh(args.content)
+    metadata_index.save()
+    if args.precompress:
+        precompress_outputs(args.output, manifest, os.cpu_count() or 1, report)
+    elif manifest.compressed:
+        remove_precompressed(args.output, manifest, report)
+    manifest.save()
+    graph.save()
+    report.save(args.deploy_report)
+    print(f"Merged {len(shard_dirs)} shard(s): {counts['copied']} page(s) copied, {counts['unchanged']} unchanged, {counts['removed']} removed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+from manifest import BuildManifest, hash_file
+from deploy_report import DeployReport
+import os
+import shutil
+
+LINK_MODES = ("copy", "hardlink", "reflink")
+
+# ioctl request number for cloning a file on Linux (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+
+def reflink_file(source: str, destination: str) -> None:
+    import fcntl
+    with open(source, "rb") as source_file, open(destination, "wb") as destination_file:
+        fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+    shutil.copystat(source, destination)
+
+
+def place_file(source: str, destination: str, link_mode: str = "copy") -> str:
+    """
+    puts source at destination with the cheapest method the filesystem allows and returns the
+    method that was used. The file appears atomically, a server never sees it half written.
+    """
+    os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+    tmp_path = f"{destination}.{os.getpid()}.tmp"
+    used = "copy"
+    try:
+        if link_mode == "hardlink":
+            try:
+                os.link(source, tmp_path)
+                used = "hardlink"
+            except OSError:
+                # Different filesystems or no hardlink support
+                pass
+        elif link_mode == "reflink":
+            try:
+                reflink_file(source, tmp_path)
+                used = "reflink"
+            except (OSError, ImportError):
+                pass
+        if used == "copy":
+            shutil.copy2(source, tmp_path)
+        os.replace(tmp_path, destination)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    return used
+
+
+def prune_empty_dirs(path: str, root: str) -> None:
+    # Drop directories left empty by a removal, but never root itself
+    parent = os.path.dirname(path)
+    root = os.path.abspath(root)
+    while parent and os.path.abspath(parent) != root and os.path.isdir(parent) and not os.listdir(parent):
+        os.rmdir(parent)
+        parent = os.path.dirname(parent)
+
+
+def file_is_current(source: str, destination: str, checksum: bool = False) -> bool:
+    try:
+        source_stat = os.stat(source)
+        destination_stat = os.stat(destination)
+    except FileNotFoundError:
+        return False
+    if source_stat.st_size != destination_stat.st_size:
+        return False
+    if source_stat.st_mtime_ns == destination_stat.st_mtime_ns:
+        return True
+    if checksum and hash_file(source) == hash_file(destination):
+        # Same content with a different mtime, just carry the mtime over
+        shutil.copystat(source, destination)
+        return True
+    return False
+
+
+def sync_static(source_dir: str, destination_dir: str, manifest: BuildManifest, checksum: bool = False, link_mode: str = "copy", changed: set[str] = None, names: dict[str, str] = None, report: DeployReport = None) -> dict[str, int]:
+    """
+    brings the copies of static files in destination_dir up to date with source_dir.
+
+    Only new or changed files (by size and mtime, or content hash with checksum=True) are
+    copied, and files the manifest says came from source_dir but are gone there are removed.
+    Generated pages living in the same directory are never touched. changed, if given, collects
+    the paths (relative to source_dir) of every file copied or removed. names, if given, maps
+    paths relative to source_dir to the names their copies get instead (see fingerprint.py), the
+    copy under a file's previous name is removed. report, if given, records every output
+    written or removed.
+    """
+    names = names or {}
+    counts = {"copied": 0, "unchanged": 0, "removed": 0}
+    current = {}
+    hashes = {}
+    if os.path.exists(source_dir):
+        for root, dirs, files in os.walk(source_dir):
+            dirs.sort()
+            for file_item in sorted(files):
+                source_path = os.path.join(root, file_item)
+                rel_path = os.path.relpath(source_path, source_dir)
+                destination_path = os.path.join(destination_dir, names.get(rel_path, rel_path))
+                current[rel_path] = os.path.normpath(destination_path)
+
+                if file_is_current(source_path, destination_path, checksum):
+                    counts["unchanged"] += 1
+                    continue
+                print(f"Copying {source_path} to {destination_path}...")
+                existed = os.path.exists(destination_path)
+                digest = hash_file(source_path)
+                place_file(source_path, destination_path, link_mode)
+                counts["copied"] += 1
+                hashes[rel_path] = digest
+                # Copied only because the mtime changed, the content is what was copied last time
+                if existed and manifest.static_hashes.get(rel_path) == digest:
+                    continue
+                if report is not None:
+                    report.record_write(destination_path, existed, digest)
+                if changed is not None:
+                    changed.add(rel_path)
+
+    # Paths are compared absolute, the same output directory may be spelled differently between
+    # builds, and nothing placed by this sync is ever removed
+    placed = set(os.path.abspath(path) for path in current.values())
+    for rel_path in sorted(set(manifest.static) - set(current)):
+        if changed is not None:
+            changed.add(rel_path)
+        destination_path = manifest.static[rel_path]
+        if os.path.exists(destination_path) and os.path.abspath(destination_path) not in placed:
+            print(f"Removing {destination_path}, its static source was deleted...")
+            os.unlink(destination_path)
+            prune_empty_dirs(destination_path, destination_dir)
+            if report is not None:
+                report.record_removal(destination_path)
+            counts["removed"] += 1
+
+    # Copies left under an old name, after a file changed its content hash or was renamed
+    for rel_path in sorted(set(manifest.static) & set(current)):
+        if os.path.abspath(manifest.static[rel_path]) not in placed and os.path.exists(manifest.static[rel_path]):
+            os.unlink(manifest.static[rel_path])
+            prune_empty_dirs(manifest.static[rel_path], destination_dir)
+            if report is not None:
+                report.record_removal(manifest.static[rel_path])
+    manifest.static = current
+    manifest.static_hashes = {rel_path: digest for rel_path, digest in {**manifest.static_hashes, **hashes}.items() if rel_path in current}
+    return counts
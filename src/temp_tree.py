@@ -0,0 +1,25 @@
+import os
+import tempfile
+import unittest
+
+
+class TempTreeTestCase(unittest.TestCase):
+    """
+    a test case working in a temporary directory, root, that is removed after every test.
+    Subclasses overriding setUp call super().setUp() first.
+    """
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+
+    def write(self, path, text):
+        """
+        writes text to path, relative to root unless absolute, creating its directories, and
+        returns the full path
+        """
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(text)
+        return path
@@ -0,0 +1,182 @@
+from htmlnode import HTMLNode
+from manifest import hash_bytes
+import re
+
+SLOT_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+URL_PROP_PATTERN = re.compile(r'\b(href|src)="(/[^"]*)"')
+URL_PROPS = ("href", "src")
+
+# Elements whose content is kept exactly as written when minifying
+RAW_TEXT_PATTERN = re.compile(r"(<(pre|textarea|script|style)\b.*?</\2\s*>)", re.DOTALL | re.IGNORECASE)
+# Conditional comments (<!--[if IE]>) are kept, browsers read them
+COMMENT_PATTERN = re.compile(r"<!--(?!\[).*?-->", re.DOTALL)
+# Whitespace between two tags, with the names of both ("!" for doctypes and conditional comments)
+GAP_PATTERN = re.compile(r"(<(?:/?([a-zA-Z][\w-]*)|(!))[^>]*>)\s+(?=</?([a-zA-Z][\w-]*|!))")
+# Elements that start a new line or aren't rendered at all, whitespace next to them never shows.
+# Between inline elements (<b>hello</b> <i>world</i>) it is a visible space and one is kept.
+BLOCK_TAGS = frozenset((
+    "!", "html", "head", "body", "title", "meta", "link", "base", "script", "style", "noscript", "template",
+    "address", "article", "aside", "blockquote", "details", "dialog", "dd", "div", "dl", "dt", "fieldset",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "legend",
+    "li", "main", "nav", "ol", "p", "pre", "section", "summary", "table", "caption", "colgroup", "col",
+    "thead", "tbody", "tfoot", "tr", "td", "th", "ul", "option", "optgroup", "source", "track", "br",
+))
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def collapse_gap(match: re.Match) -> str:
+    previous_tag = (match.group(2) or match.group(3)).lower()
+    next_tag = match.group(4).lower()
+    if previous_tag in BLOCK_TAGS or next_tag in BLOCK_TAGS:
+        return match.group(1)
+    return match.group(1) + " "
+
+
+def minify_html(source: str) -> str:
+    """
+    strips comments and whitespace between tags next to block level elements and collapses other
+    runs of whitespace to one space. pre, textarea, script and style elements are left untouched.
+    """
+    parts = RAW_TEXT_PATTERN.split(source)
+    minified = []
+    # split returns text, then the two groups of every raw text element
+    for i in range(0, len(parts), 3):
+        # Stand-in tags for the raw text elements on either side, so whitespace next to them is
+        # treated like whitespace next to any other tag of that name
+        before = f"</{parts[i - 1]}>" if i > 0 else ""
+        after = f"<{parts[i + 2]}>" if i + 1 < len(parts) else ""
+        text = COMMENT_PATTERN.sub("", before + parts[i] + after)
+        text = GAP_PATTERN.sub(collapse_gap, text)
+        text = WHITESPACE_PATTERN.sub(" ", text)
+        minified.append(text[len(before):len(text) - len(after)])
+        if i + 1 < len(parts):
+            minified.append(parts[i + 1])
+    return "".join(minified).strip()
+
+
+def rebase_url(url: str, base_path: str) -> str:
+    """
+    points a root-relative url ("/images/a.png") at the site's base path ("/blog/images/a.png")
+    """
+    if url is not None and url.startswith("/"):
+        return base_path + url[1:]
+    return url
+
+
+def map_srcset(srcset: str, function) -> str:
+    """
+    applies function to the url of every candidate in a srcset ("/a-480w.png 480w, /a.png 960w")
+    """
+    candidates = []
+    for candidate in srcset.split(","):
+        url, _, descriptor = candidate.strip().partition(" ")
+        candidates.append(f"{function(url)} {descriptor}" if descriptor else function(url))
+    return ", ".join(candidates)
+
+
+def rebase_node_urls(node: HTMLNode, base_path: str) -> HTMLNode:
+    """
+    rewrites the href, src and srcset props of every node in the tree in place, instead of
+    searching the rendered html for 'href="/' afterwards
+    """
+    if base_path == "/":
+        return node
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.props:
+            for prop in URL_PROPS:
+                if prop in current.props:
+                    current.props[prop] = rebase_url(current.props[prop], base_path)
+            if "srcset" in current.props:
+                current.props["srcset"] = map_srcset(current.props["srcset"], lambda url: rebase_url(url, base_path))
+        if current.children:
+            stack.extend(current.children)
+    return node
+
+
+class Template():
+    """
+    a template compiled once per build. The source is split into literal segments and
+    named slots ({{ Title }}, {{ Content }}) so rendering a page is a single join.
+
+    literals - the text around the slots, always one more than there are slots\n
+    slots - the slot names in the order they appear\n
+    digest - sha256 of the template source, used by the build manifest\n
+    minify - strip comments and whitespace from the template when it is compiled, the html of
+    the nodes filling the slots carries no whitespace of its own\n
+    assets - asset urls from fingerprint.asset_urls, root-relative links to them are pointed at
+    their hashed names
+    """
+    def __init__(self, source: str, base_path: str = "/", path: str = None, minify: bool = False, assets: dict = None) -> None:
+        self.path = path
+        self.base_path = base_path
+        self.minify = minify
+        # Switching minify on or off has to render every page again
+        digest_source = "minify\0" + source if minify else source
+        if minify:
+            source = minify_html(source)
+
+        if assets is not None:
+            used = {}
+            def fingerprint(match):
+                url = assets["urls"].get(match.group(2))
+                if url is None:
+                    return match.group(0)
+                used[match.group(2)] = url
+                return f'{match.group(1)}="{url}"'
+            source = URL_PROP_PATTERN.sub(fingerprint, source)
+            # Only the assets the template links to matter, a new stylesheet hash renders every page again
+            digest_source += "\0assets " + " ".join(f"{url}={used[url]}" for url in sorted(used))
+        self.digest = hash_bytes(digest_source.encode())
+
+        # Root-relative links in the template itself are rewritten here, once
+        source = source.replace('href="/', f'href="{base_path}')
+        source = source.replace('src="/', f'src="{base_path}')
+
+        self.literals = []
+        self.slots = []
+        self.placeholders = []
+        position = 0
+        for match in SLOT_PATTERN.finditer(source):
+            self.literals.append(source[position:match.start()])
+            self.slots.append(match.group(1))
+            self.placeholders.append(match.group(0))
+            position = match.end()
+        self.literals.append(source[position:])
+
+    @classmethod
+    def load(cls, template_path: str, base_path: str = "/", minify: bool = False, assets: dict = None) -> "Template":
+        with open(template_path, "r") as template_file:
+            return cls(template_file.read(), base_path, template_path, minify, assets)
+
+    def render(self, **values: str | HTMLNode) -> str:
+        # Slots without a value are left as they were written in the template
+        parts = [self.literals[0]]
+        for i, slot in enumerate(self.slots):
+            value = values.get(slot, self.placeholders[i])
+            if isinstance(value, HTMLNode):
+                value = value.to_html()
+            parts.append(value)
+            parts.append(self.literals[i + 1])
+        return "".join(parts)
+
+    def write(self, out, **values: str | HTMLNode) -> None:
+        """
+        like render, but streams into a file-like object. Node values are written
+        fragment by fragment so the page is never held in memory as one string, and
+        callable values are called with out to write their slot themselves.
+        """
+        out.write(self.literals[0])
+        for i, slot in enumerate(self.slots):
+            value = values.get(slot, self.placeholders[i])
+            if isinstance(value, HTMLNode):
+                value.write_html(out)
+            elif callable(value):
+                value(out)
+            else:
+                out.write(value)
+            out.write(self.literals[i + 1])
+
+    def __repr__(self) -> str:
+        return f"Template({self.path!r}, slots: {self.slots!r}, {self.base_path!r})"
@@ -0,0 +1,92 @@
+import unittest
+import contextlib
+import io
+import os
+import time
+from ast_cache import AstCache, encode_node, decode_node, main
+from block_markdown import markdown_to_html_node
+from main import generate_pages_recursively
+from temp_tree import TempTreeTestCase
+
+
+MARKDOWN = """# Title
+
+some **bold** and _italic_ text with a [link](/page) and ![image](/images/a.png)
+
+> quoted
+
+1. one
+2. two
+
+```
+code
+```"""
+
+
+class TestAstCache(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = AstCache(os.path.join(self.root, "ast"))
+
+    def test_round_trip(self):
+        node = markdown_to_html_node(MARKDOWN)
+        self.assertEqual(decode_node(encode_node(node)).to_html(), node.to_html())
+
+    def test_get_and_put(self):
+        key = self.cache.key(MARKDOWN)
+        self.assertIsNone(self.cache.get(key))
+        references = {"links": ["/page"], "images": ["/images/a.png"]}
+        self.cache.put(key, "Title", references, markdown_to_html_node(MARKDOWN))
+        title, cached_references, node = self.cache.get(key)
+        self.assertEqual((title, cached_references), ("Title", references))
+        self.assertEqual(node.to_html(), markdown_to_html_node(MARKDOWN).to_html())
+        self.assertEqual(self.cache.stats(), {"hits": 1, "misses": 1})
+        self.assertNotEqual(key, self.cache.key(MARKDOWN + " "))
+
+    def test_corrupt_entry_is_a_miss(self):
+        key = self.cache.key(MARKDOWN)
+        self.cache.put(key, "Title", {}, markdown_to_html_node(MARKDOWN))
+        with open(self.cache.entry_path(key), "wb") as file:
+            file.write(b"not zlib")
+        self.assertIsNone(self.cache.get(key))
+
+    def test_prune_drops_least_recently_used(self):
+        keys = [self.cache.key(f"# Page {i}") for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, f"Page {i}", {}, markdown_to_html_node(f"# Page {i}"))
+            os.utime(self.cache.entry_path(key), (time.time() - 100 + i, time.time() - 100 + i))
+        self.cache.get(keys[0])
+        size = os.path.getsize(self.cache.entry_path(keys[0]))
+        self.cache.max_bytes = size * 2
+        self.assertEqual(self.cache.prune(), 1)
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[0]))
+
+    def test_clean_command(self):
+        self.cache.put(self.cache.key(MARKDOWN), "Title", {}, markdown_to_html_node(MARKDOWN))
+        with contextlib.redirect_stdout(io.StringIO()):
+            main(["--cache-dir", self.cache.path, "clean"])
+        self.assertFalse(os.path.exists(self.cache.path))
+
+    def test_build_output_matches(self):
+        content = os.path.join(self.root, "content")
+        template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(content, "index.md"), MARKDOWN)
+
+        def build(dest, base_path, page_options=None):
+            results = {}
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursively(content, template, dest, base_path, page_options=page_options, on_result=results.__setitem__)
+            with open(os.path.join(dest, "index.html")) as file:
+                return file.read(), results[os.path.join(content, "index.md")]
+
+        options = {"ast_cache": {"path": self.cache.path}}
+        for base_path in ("/", "/site/", "/other/"):
+            expected, _ = build(os.path.join(self.root, "plain"), base_path)
+            html, result = build(os.path.join(self.root, "cached"), base_path, options)
+            self.assertEqual(html, expected)
+            self.assertEqual(result["ast_cache"], {"hits": 0, "misses": 1} if base_path == "/" else {"hits": 1, "misses": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import contextlib
+import io
+import json
+import os
+import tempfile
+from benchmark import CorpusGenerator, parse_block_mix, main
+from block_markdown import markdown_to_html_node
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_corpus_is_deterministic(self):
+        first = CorpusGenerator(pages=5, seed=3)
+        second = CorpusGenerator(pages=5, seed=3)
+        self.assertEqual([first.page(i) for i in range(5)], [second.page(i) for i in range(5)])
+
+    def test_corpus_pages_render(self):
+        corpus = CorpusGenerator(pages=20, blocks=30, inline_density=0.5)
+        for number in range(20):
+            html = markdown_to_html_node(corpus.page(number)).to_html()
+            self.assertTrue(html.startswith(f"<div><h1>Page {number}</h1>"))
+
+    def test_corpus_layout(self):
+        with tempfile.TemporaryDirectory() as root:
+            paths = CorpusGenerator(pages=12, depth=3).write(root)
+            self.assertEqual(len(paths), 12)
+            self.assertEqual(os.path.relpath(paths[11], root), os.path.join("section1", "section0", "section0", "page11", "index.md"))
+
+    def test_parse_block_mix(self):
+        self.assertEqual(parse_block_mix("paragraph=3,code=1"), {"paragraph": 3, "code": 1})
+        with self.assertRaises(ValueError):
+            parse_block_mix("table=1")
+
+    def test_main_writes_json(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "results.json")
+            with contextlib.redirect_stdout(io.StringIO()):
+                main(["--pages", "3", "--blocks", "4", "--repeat", "1", "--json", path])
+            with open(path) as file:
+                results = json.load(file)
+        self.assertEqual(results["corpus"]["pages"], 3)
+        self.assertIn("text_to_textnodes", results["stages"])
+        self.assertIn("write", results["stages"])
+
+
+if __name__ == "__main__":
+    unittest.main()
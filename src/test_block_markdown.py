@@ -1,6 +1,8 @@
 import unittest
+import io
 from block_markdown import *
 from main import extract_title
+from benchmark import CorpusGenerator, chain_block_to_block_type
 import os
 import sys
 
@@ -159,6 +161,49 @@ the **same** even with inline stuff
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+    def test_classify_block_matches_chain(self):
+        corpus = CorpusGenerator(pages=20, blocks=30)
+        blocks = [block for number in range(20) for block in markdown_to_blocks(corpus.page(number))]
+        blocks += ["#no space", "####### seven", "```\nunclosed", "> a\nb", "- a\n-b", "1. a\n3. b", "2. a", "", "-"]
+        for block in blocks:
+            block_type, lines = classify_block(block)
+            self.assertEqual(block_type, chain_block_to_block_type(block), block)
+            self.assertEqual(lines, block.split("\n"))
+
+    def test_iter_markdown_blocks_matches_markdown_to_blocks(self):
+        documents = [
+            "",
+            "\n\n\n",
+            "# heading\n\nparagraph\nsecond line\n\n\n\n- a\n- b\n",
+            "a\n\n\nb\n\n \n\nc",
+            "no trailing newline",
+        ]
+        for md in documents:
+            with self.subTest(md=md):
+                self.assertEqual(list(iter_markdown_blocks(io.StringIO(md))), markdown_to_blocks(md))
+
+    def test_stream_markdown_to_html(self):
+        md = """
+# this is an h1
+
+this is **paragraph** text
+
+```
+code stays
+```
+
+> a quote
+"""
+        out = io.StringIO()
+        stream_markdown_to_html(io.StringIO(md), out)
+        self.assertEqual(out.getvalue(), markdown_to_html_node(md).to_html())
+
+    def test_stream_markdown_to_html_transform(self):
+        seen = []
+        out = io.StringIO()
+        stream_markdown_to_html(io.StringIO("# a\n\nb"), out, seen.append)
+        self.assertEqual([node.tag for node in seen], ["h1", "p"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import contextlib
+import io
+import os
+from dependency_graph import DependencyGraph, page_references, page_site_path, site_path, main
+from main import generate_pages_recursively
+from manifest import BuildManifest
+from temp_tree import TempTreeTestCase
+
+
+class TestReferences(unittest.TestCase):
+    def test_page_references(self):
+        blocks = [
+            "see [tom](/blog/tom) and ![elf](/images/elf.png)",
+            "```\n[not a link](/nowhere)\n```",
+            "- [one](one.html)\n- [two](https://example.com)",
+        ]
+        self.assertEqual(page_references(blocks), {
+            "links": ["/blog/tom", "one.html", "https://example.com"],
+            "images": ["/images/elf.png"],
+        })
+
+    def test_page_site_path(self):
+        self.assertEqual(page_site_path("content/index.md", "content"), "/")
+        self.assertEqual(page_site_path("content/blog/tom/index.md", "content"), "/blog/tom/")
+        self.assertEqual(page_site_path("content/about.md", "content"), "/about.html")
+
+    def test_site_path(self):
+        self.assertEqual(site_path("/blog/tom#top", "/"), "/blog/tom")
+        self.assertEqual(site_path("../majesty/", "/blog/tom/"), "/blog/majesty/")
+        self.assertEqual(site_path("elf.png", "/blog/tom/"), "/blog/tom/elf.png")
+        self.assertEqual(site_path("/", "/blog/tom/"), "/")
+        self.assertIsNone(site_path("https://example.com/a", "/"))
+        self.assertIsNone(site_path("mailto:me@example.com", "/"))
+        self.assertIsNone(site_path("#top", "/"))
+
+
+class TestDependencyGraph(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.output = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.static, "images", "elf.png"), "png")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[tom](/blog/tom) and [gone](/blog/gone)")
+        self.write(os.path.join(self.content, "blog", "tom", "index.md"), "# Tom\n\n![elf](/images/elf.png)\n\n[home](/)")
+        self.write(os.path.join(self.content, "blog", "big", "index.md"), "# Big\n\n![missing](/images/missing.png)")
+
+    def build(self, graph, manifest=None, changed_static=None, page_options=None):
+        rendered = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursively(self.content, self.template, self.output, "/", manifest, page_options=page_options, on_result=lambda path, result: rendered.append(path), graph=graph, changed_static=changed_static)
+        return rendered
+
+    def test_records_references(self):
+        graph = DependencyGraph(os.path.join(self.root, "graph.json"))
+        # The big page is streamed, its references are collected block by block
+        self.build(graph, page_options={"stream_threshold": 40})
+        tom = os.path.join(self.content, "blog", "tom", "index.md")
+        self.assertEqual(graph.pages[tom], {"template": os.path.normpath(self.template), "links": ["/"], "images": ["/images/elf.png"]})
+        self.assertEqual(graph.dependents(site_paths={"/images/elf.png"}), [tom])
+        self.assertEqual(len(graph.dependents(template=self.template)), 3)
+        self.assertEqual(graph.broken_links(self.content, self.static), [
+            (os.path.join(self.content, "blog", "big", "index.md"), "/images/missing.png"),
+            (os.path.join(self.content, "index.md"), "/blog/gone"),
+        ])
+
+    def test_changed_static_rebuilds_dependents(self):
+        graph = DependencyGraph(os.path.join(self.root, "graph.json"))
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+        self.assertEqual(len(self.build(graph, manifest)), 3)
+        self.assertEqual(self.build(graph, manifest), [])
+        tom = os.path.join(self.content, "blog", "tom", "index.md")
+        self.assertEqual(self.build(graph, manifest, {os.path.join("images", "elf.png")}), [tom])
+
+    def test_pages_missing_from_the_graph_count_as_dependents(self):
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+        self.build(DependencyGraph(os.path.join(self.root, "graph.json")), manifest)
+        # The graph is gone but the manifest says every page is current
+        graph = DependencyGraph(os.path.join(self.root, "graph.json"))
+        self.assertEqual(len(self.build(graph, manifest, {os.path.join("images", "elf.png")})), 3)
+        self.assertEqual(len(graph.pages), 3)
+        self.assertEqual(self.build(graph, manifest, set()), [])
+
+    def test_removed_pages_leave_the_graph(self):
+        graph = DependencyGraph(os.path.join(self.root, "graph.json"))
+        self.build(graph)
+        tom = os.path.join(self.content, "blog", "tom", "index.md")
+        os.unlink(tom)
+        self.build(graph)
+        self.assertNotIn(tom, graph.pages)
+
+    def test_save_load_and_query(self):
+        path = os.path.join(self.root, ".build", "graph.json")
+        graph = DependencyGraph(path)
+        self.build(graph)
+        graph.save()
+        self.assertEqual(DependencyGraph.load(path).pages, graph.pages)
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            status = main(["--graph", path, "--content", self.content, "--static", self.static, "--broken-links"])
+        self.assertEqual(status, 1)
+        self.assertIn("broken link to /blog/gone", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
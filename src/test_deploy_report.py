@@ -0,0 +1,76 @@
+import unittest
+import contextlib
+import io
+import json
+import os
+from deploy_report import DeployReport
+from manifest import BuildManifest, hash_bytes
+from precompress import precompress_outputs
+from static_sync import sync_static
+from main import generate_pages_recursively
+from temp_tree import TempTreeTestCase
+
+
+class TestDeployReport(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.docs = os.path.join(self.root, "docs")
+        self.report = DeployReport(self.docs)
+
+    def test_records(self):
+        self.report.record_write(os.path.join(self.docs, "new.html"), False, "h1")
+        self.report.record_write(os.path.join(self.docs, "old.html"), True, "h2")
+        self.report.record_removal(os.path.join(self.docs, "gone.html"))
+        self.assertEqual(self.report.summary(), "1 added, 1 modified, 1 removed")
+
+        # Written and removed in one build, the deploy target never saw it
+        self.report.record_write(os.path.join(self.docs, "tmp.html"), False, "h3")
+        self.report.record_removal(os.path.join(self.docs, "tmp.html"))
+        # Removed and written again, it changed
+        self.report.record_write(os.path.join(self.docs, "gone.html"), False, "h4")
+        # Outside the output directory
+        self.report.record_write(os.path.join(self.root, "other.json"), False, "h5")
+
+        data = self.report.to_dict()
+        self.assertEqual(data["added"], {"new.html": "h1"})
+        self.assertEqual(data["modified"], {"gone.html": "h4", "old.html": "h2"})
+        self.assertEqual(data["removed"], [])
+
+    def test_save_hashes_files(self):
+        self.write(os.path.join(self.docs, "css", "a.css"), "body {}")
+        self.report.record_write(os.path.join(self.docs, "css", "a.css"), False)
+        path = os.path.join(self.root, "report.json")
+        self.report.save(path)
+        with open(path) as file:
+            data = json.load(file)
+        self.assertEqual(data["added"], {"css/a.css": hash_bytes(b"body {}")})
+        self.assertFalse(data["full"])
+
+    def test_build(self):
+        content = os.path.join(self.root, "content")
+        static = os.path.join(self.root, "static")
+        template = os.path.join(self.root, "template.html")
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+        self.write(template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(content, "index.md"), "# Home")
+        self.write(os.path.join(content, "about.md"), "# About")
+        self.write(os.path.join(static, "index.css"), "body {}")
+
+        def build():
+            report = DeployReport(self.docs)
+            with contextlib.redirect_stdout(io.StringIO()):
+                sync_static(static, self.docs, manifest, report=report)
+                generate_pages_recursively(content, template, self.docs, "/", manifest, report=report)
+                precompress_outputs(self.docs, manifest, report=report)
+            data = report.to_dict()
+            return sorted(data["added"]), sorted(data["modified"]), data["removed"]
+
+        self.assertEqual(build()[0], ["about.html", "about.html.gz", "index.css", "index.css.gz", "index.html", "index.html.gz"])
+        self.assertEqual(build(), ([], [], []))
+        self.write(os.path.join(content, "index.md"), "# Home again")
+        os.unlink(os.path.join(content, "about.md"))
+        self.assertEqual(build(), ([], ["index.html", "index.html.gz"], ["about.html", "about.html.gz"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
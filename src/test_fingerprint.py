@@ -0,0 +1,113 @@
+import unittest
+import contextlib
+import io
+import json
+import os
+from fingerprint import fingerprinted_name, fingerprint_assets, asset_urls, write_asset_manifest, remove_asset_manifest, fingerprint_node_urls
+from htmlnode import LeafNode, ParentNode
+from manifest import BuildManifest, hash_bytes
+from deploy_report import DeployReport
+from dependency_graph import DependencyGraph
+from static_sync import sync_static
+from template import Template
+from main import generate_pages_recursively
+from temp_tree import TempTreeTestCase
+
+
+class TestFingerprint(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.docs = os.path.join(self.root, "docs")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+        self.write(os.path.join(self.static, "robots.txt"), "User-agent: *")
+
+    def test_names(self):
+        self.assertEqual(fingerprinted_name(os.path.join("images", "a.png"), "0123456789abcdef"), os.path.join("images", "a.0123456789.png"))
+        names = fingerprint_assets(self.static)
+        css = hash_bytes(b"body {}")[:10]
+        self.assertEqual(names["index.css"], f"index.{css}.css")
+        # Files fetched by name keep it
+        self.assertNotIn("robots.txt", names)
+        assets = asset_urls(names)
+        self.assertEqual(assets["urls"]["/index.css"], f"/index.{css}.css")
+        self.assertEqual(sorted(assets["urls"]), ["/images/a.png", "/index.css"])
+
+        path = os.path.join(self.docs, "asset-manifest.json")
+        write_asset_manifest(path, assets)
+        with open(path) as file:
+            self.assertEqual(json.load(file), assets["urls"])
+
+        # Turning fingerprinting off again removes it
+        report = DeployReport(self.docs)
+        self.assertTrue(remove_asset_manifest(path, report))
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(report.removed, {"asset-manifest.json"})
+        self.assertFalse(remove_asset_manifest(path, report))
+
+    def test_node_urls(self):
+        assets = {"urls": {"/images/a.png": "/images/a.1234.png", "/index.css": "/index.5678.css"}}
+        image = LeafNode("img", "", {"src": "/images/a.png", "srcset": "/images/a-480w.png 480w, /images/a.png 960w"})
+        link = LeafNode("a", "css", {"href": "/index.css"})
+        other = LeafNode("a", "page", {"href": "/blog/"})
+        fingerprint_node_urls(ParentNode("p", [image, link, other]), assets)
+        self.assertEqual(image.props["src"], "/images/a.1234.png")
+        self.assertEqual(image.props["srcset"], "/images/a-480w.png 480w, /images/a.1234.png 960w")
+        self.assertEqual(link.props["href"], "/index.5678.css")
+        self.assertEqual(other.props["href"], "/blog/")
+
+    def test_template(self):
+        source = '<link href="/index.css" /><a href="/about.html">{{ Content }}</a>'
+        assets = {"urls": {"/index.css": "/index.5678.css", "/images/a.png": "/images/a.1234.png"}}
+        template = Template(source, "/site/", assets=assets)
+        self.assertEqual(template.render(Content="x"), '<link href="/site/index.5678.css" /><a href="/site/about.html">x</a>')
+        self.assertNotEqual(template.digest, Template(source, "/site/").digest)
+        # Only assets the template links to count
+        other_image = {"urls": dict(assets["urls"], **{"/images/a.png": "/images/a.9999.png"})}
+        self.assertEqual(template.digest, Template(source, "/site/", assets=other_image).digest)
+
+    def test_sync_renames_and_removes_old_copies(self):
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            sync_static(self.static, self.docs, manifest, names=fingerprint_assets(self.static))
+            old = manifest.static["index.css"]
+            self.assertTrue(os.path.exists(old))
+            self.assertFalse(os.path.exists(os.path.join(self.docs, "index.css")))
+            self.assertTrue(os.path.exists(os.path.join(self.docs, "robots.txt")))
+
+            self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+            changed = set()
+            sync_static(self.static, self.docs, manifest, changed=changed, names=fingerprint_assets(self.static))
+        self.assertEqual(changed, {"index.css"})
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(manifest.static["index.css"]))
+
+    def test_incremental_build(self):
+        content = os.path.join(self.root, "content")
+        template = os.path.join(self.root, "template.html")
+        self.write(template, "<title>{{ Title }}</title><article>{{ Content }}</article>")
+        self.write(os.path.join(content, "index.md"), "# Home\n\n![a](/images/a.png)")
+        self.write(os.path.join(content, "about.md"), "# About\n\nno images")
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+        graph = DependencyGraph(os.path.join(self.root, "graph.json"))
+
+        def build():
+            changed = set()
+            names = fingerprint_assets(self.static)
+            rendered = {}
+            with contextlib.redirect_stdout(io.StringIO()):
+                sync_static(self.static, self.docs, manifest, changed=changed, names=names)
+                generate_pages_recursively(content, template, self.docs, "/site/", manifest, page_options={"assets": asset_urls(names)}, on_result=rendered.__setitem__, graph=graph, changed_static=changed)
+            return sorted(os.path.basename(source) for source in rendered)
+
+        self.assertEqual(build(), ["about.md", "index.md"])
+        self.write(os.path.join(self.static, "images", "a.png"), "new png")
+        self.assertEqual(build(), ["index.md"])
+        with open(os.path.join(self.docs, "index.html")) as file:
+            url = "/site/" + os.path.relpath(manifest.static[os.path.join("images", "a.png")], self.docs).replace(os.sep, "/")
+            self.assertIn(f'src="{url}"', file.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -21,6 +21,15 @@ class TestHtml(unittest.TestCase):
         expected = ' href="https://www.google.com" target="_blank"'
 
         self.assertEqual(result, expected)
+
+    def test_nodes_are_compact(self):
+        leaf = LeafNode("p", "text")
+        parent = ParentNode("d" + "iv", [leaf])
+        self.assertFalse(hasattr(leaf, "__dict__"))
+        self.assertFalse(hasattr(parent, "__dict__"))
+        self.assertIs(parent.tag, ParentNode("div", []).tag)
+        self.assertIsNone(LeafNode("p", "text", {}).props)
+        self.assertEqual(LeafNode("p", "text", {}).to_html(), "<p>text</p>")
    
 
 if __name__ == "__main__":
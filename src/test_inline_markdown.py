@@ -6,7 +6,11 @@ from inline_markdown import (
     extract_markdown_links, 
     split_nodes_image, 
     split_nodes_link,
-    text_to_textnodes
+    text_to_textnodes,
+    split_text_to_textnodes,
+    scan_text_to_textnodes,
+    compare_text_to_textnodes,
+    set_inline_tokenizer,
 )
 
 from textnode import TextNode, TextType
@@ -190,5 +194,67 @@ class TestInlineMarkdown(unittest.TestCase):
             ],
             nodes,
         )
+
+    def test_plain_text_fast_paths(self):
+        self.assertListEqual(split_text_to_textnodes("just prose, [brackets] and *stars*"), [TextNode("just prose, [brackets] and *stars*", TextType.TEXT)])
+        self.assertListEqual(split_text_to_textnodes(""), [])
+        self.assertListEqual(extract_markdown_links("no links [here]"), [])
+        self.assertListEqual(extract_markdown_images("[link](/x) but no image"), [])
+        nodes = [TextNode("", TextType.TEXT), TextNode("plain", TextType.TEXT)]
+        self.assertListEqual(split_nodes_by_delimiter(nodes, "`", TextType.CODE), [TextNode("plain", TextType.TEXT)])
+
+
+class TestScanTokenizer(unittest.TestCase):
+    CASES = [
+        "",
+        "plain text",
+        "This is **text** with an _italic_ word and a `code block` and an ![image](https://i.imgur.com/zjjcJKZ.png) and a [link](https://boot.dev)",
+        "`code with **bold** and _italic_ inside`",
+        "**bold with _italic_ and [link](/x) inside**",
+        "a ****empty bold**** b",
+        "***three***",
+        "![a](b)[c](d)![e](f)",
+        "[link](https://example.com/some_path_here)",
+        "text!`code`[link](/x)",
+        "_wow!_[link](/x)",
+    ]
+
+    INVALID = [
+        "unclosed `code",
+        "unclosed **bold",
+        "unclosed _italic",
+        "**bold across `code** span`",
+        "_italic across **bold_ span**",
+    ]
+
+    def test_scan_matches_split(self):
+        for text in self.CASES:
+            with self.subTest(text=text):
+                self.assertListEqual(split_text_to_textnodes(text), scan_text_to_textnodes(text))
+
+    def test_scan_rejects_what_split_rejects(self):
+        for text in self.INVALID:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    split_text_to_textnodes(text)
+                with self.assertRaises(ValueError):
+                    scan_text_to_textnodes(text)
+
+    def test_compare(self):
+        for text in self.CASES:
+            self.assertListEqual(compare_text_to_textnodes(text), split_text_to_textnodes(text))
+        with self.assertRaises(ValueError):
+            compare_text_to_textnodes("unclosed `code")
+
+    def test_set_inline_tokenizer(self):
+        try:
+            set_inline_tokenizer("scan")
+            self.assertListEqual(text_to_textnodes(self.CASES[2]), split_text_to_textnodes(self.CASES[2]))
+            with self.assertRaises(ValueError):
+                set_inline_tokenizer("nope")
+        finally:
+            set_inline_tokenizer("split")
+
+
 if __name__ == "__main__":
     unittest.main()
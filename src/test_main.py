@@ -0,0 +1,133 @@
+import unittest
+import contextlib
+import io
+import os
+from main import generate_pages_recursively, parse_args, PageGenerationError
+from manifest import BuildManifest
+from temp_tree import TempTreeTestCase
+
+
+TEMPLATE = '<title>{{ Title }}</title><link href="/index.css" /><article>{{ Content }}</article>'
+
+
+class TestGeneratePages(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, TEMPLATE)
+        for i in range(6):
+            self.write(
+                os.path.join(self.content, f"page{i}", "index.md"),
+                f"# Page {i}\n\nsome **bold** text and a [link](/page{i + 1})\n\n- one\n- two",
+            )
+
+    def build(self, dest, jobs, page_options=None, io_threads=0):
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursively(self.content, self.template, dest, "/site/", jobs=jobs, page_options=page_options, io_threads=io_threads)
+
+    def read_tree(self, root):
+        files = {}
+        for dirpath, dirs, names in os.walk(root):
+            for name in names:
+                path = os.path.join(dirpath, name)
+                with open(path, "rb") as file:
+                    files[os.path.relpath(path, root)] = file.read()
+        return files
+
+    def test_parallel_output_matches_serial(self):
+        serial = os.path.join(self.root, "serial")
+        parallel = os.path.join(self.root, "parallel")
+        self.build(serial, 1)
+        self.build(parallel, 3)
+        self.assertEqual(len(self.read_tree(serial)), 6)
+        self.assertEqual(self.read_tree(serial), self.read_tree(parallel))
+
+    def test_streaming_output_matches(self):
+        normal = os.path.join(self.root, "normal")
+        streamed = os.path.join(self.root, "streamed")
+        self.build(normal, 1)
+        self.build(streamed, 1, {"stream_threshold": 0})
+        self.assertEqual(self.read_tree(normal), self.read_tree(streamed))
+
+    def test_block_cache_output_matches(self):
+        normal = os.path.join(self.root, "normal")
+        cached = os.path.join(self.root, "cached")
+        self.build(normal, 1)
+        for jobs in (1, 3):
+            self.build(cached, jobs, {"block_cache": {"max_entries": 100}})
+            self.assertEqual(self.read_tree(normal), self.read_tree(cached))
+
+    def test_async_io_output_matches(self):
+        serial = os.path.join(self.root, "serial")
+        pipelined = os.path.join(self.root, "pipelined")
+        self.build(serial, 1)
+        for jobs in (1, 3):
+            self.build(pipelined, jobs, io_threads=2)
+            self.assertEqual(self.read_tree(serial), self.read_tree(pipelined))
+        # Pages over the stream threshold are handed to the renderer unread
+        self.build(pipelined, 1, {"stream_threshold": 0}, io_threads=2)
+        self.assertEqual(self.read_tree(serial), self.read_tree(pipelined))
+
+    def test_async_io_profiles_reads_and_writes(self):
+        results = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursively(self.content, self.template, os.path.join(self.root, "out"), "/site/", page_options={"profile": True}, on_result=results.__setitem__, io_threads=2)
+        stages = [record["stage"] for record in results[os.path.join(self.content, "page0", "index.md")]["profile"]]
+        self.assertEqual(sorted(stages), ["parse", "read", "render", "write"])
+
+    def test_failures_name_the_source_file(self):
+        broken = os.path.join(self.content, "page3", "index.md")
+        self.write(broken, "no heading here")
+        dest = os.path.join(self.root, "out")
+        for jobs, io_threads in ((1, 0), (3, 0), (1, 2), (3, 2)):
+            with self.assertRaises(PageGenerationError) as ctx:
+                self.build(dest, jobs, io_threads=io_threads)
+            self.assertEqual([source for source, error in ctx.exception.failures], [broken])
+            self.assertIn("No header found", str(ctx.exception))
+            # The other pages still render
+            self.assertEqual(len(self.read_tree(dest)), 5)
+
+    def test_other_spelling_of_content_dir_keeps_outputs(self):
+        dest = os.path.join(self.root, "out")
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursively(self.content, self.template, dest, "/", manifest)
+            # A key left by a build that spelled the source differently, owning a current output
+            entry = manifest.remove(os.path.join(self.content, "page0", "index.md"))
+            manifest.pages[os.path.join(self.root, ".", "content", "page0", "index.md")] = entry
+            generate_pages_recursively(os.path.join(self.root, ".", "content"), self.template, dest, "/", manifest)
+        self.assertEqual(len(self.read_tree(dest)), 6)
+        self.assertEqual(sorted(manifest.pages), sorted(os.path.join(self.content, f"page{i}", "index.md") for i in range(6)))
+
+    def test_image_changes_without_graph_render_every_page(self):
+        dest = os.path.join(self.root, "out")
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+
+        def build(digest):
+            results = {}
+            images = {"widths": [480], "digest": digest, "attributes": {}}
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursively(self.content, self.template, dest, "/", manifest, page_options={"images": images}, on_result=results.__setitem__)
+            return len(results)
+
+        self.assertEqual(build("first"), 6)
+        self.assertEqual(build("first"), 0)
+        self.assertEqual(build("second"), 6)
+
+    def test_parse_args(self):
+        args = parse_args(["/site/", "--jobs", "4"])
+        self.assertEqual(args.base_path, "/site/")
+        self.assertEqual(args.jobs, 4)
+        self.assertFalse(args.full)
+        self.assertEqual(parse_args([]).base_path, "/")
+        self.assertFalse(parse_args([]).async_io)
+        self.assertEqual(parse_args(["--async-io", "--io-threads", "2"]).io_threads, 2)
+        self.assertEqual(parse_args([]).output, "./docs")
+        self.assertEqual(parse_args(["--shard", "1/2", "--output", "shard1"]).manifest, os.path.join("shard1", ".shard", "manifest.json"))
+        with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+            parse_args(["--shard", "1/2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import contextlib
+import io
+import os
+from manifest import BuildManifest, hash_file
+from main import generate_pages_recursively
+from temp_tree import TempTreeTestCase
+
+
+TEMPLATE = "<title>{{ Title }}</title><article>{{ Content }}</article>"
+
+
+class TestBuildManifest(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.manifest_path = os.path.join(self.root, ".build", "manifest.json")
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nwelcome")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nhello")
+
+    def build(self, base_path="/"):
+        manifest = BuildManifest.load(self.manifest_path)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            generate_pages_recursively(self.content, self.template, self.docs, base_path, manifest)
+        manifest.save()
+        return output.getvalue().count("Generating page")
+
+    def test_save_and_load(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record("a.md", "h1", "t1", "/", "docs/a.html")
+        manifest.save()
+        loaded = BuildManifest.load(self.manifest_path)
+        self.assertEqual(loaded.pages, manifest.pages)
+
+    def test_load_missing_or_corrupt(self):
+        self.assertEqual(BuildManifest.load(self.manifest_path).pages, {})
+        self.write(self.manifest_path, "{not json")
+        self.assertEqual(BuildManifest.load(self.manifest_path).pages, {})
+
+    def test_unchanged_pages_are_skipped(self):
+        self.assertEqual(self.build(), 2)
+        self.assertEqual(self.build(), 0)
+
+    def test_changed_source_is_rebuilt(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nchanged")
+        self.assertEqual(self.build(), 1)
+        with open(os.path.join(self.docs, "index.html")) as file:
+            self.assertIn("<p>changed</p>", file.read())
+
+    def test_template_and_base_path_changes_rebuild_everything(self):
+        self.build()
+        self.write(self.template, TEMPLATE + "\n")
+        self.assertEqual(self.build(), 2)
+        self.assertEqual(self.build("/site/"), 2)
+
+    def test_missing_output_is_rebuilt(self):
+        self.build()
+        os.unlink(os.path.join(self.docs, "index.html"))
+        self.assertEqual(self.build(), 1)
+
+    def test_removed_source_deletes_output(self):
+        self.build()
+        os.unlink(os.path.join(self.content, "blog", "post", "index.md"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+        manifest = BuildManifest.load(self.manifest_path)
+        self.assertEqual(list(manifest.pages), [os.path.join(self.content, "index.md")])
+
+    def test_hash_file(self):
+        self.assertEqual(hash_file(self.template), hash_file(self.template))
+        self.assertEqual(len(hash_file(self.template)), 64)
+
+
+if __name__ == "__main__":
+    unittest.main()
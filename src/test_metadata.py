@@ -0,0 +1,100 @@
+import unittest
+import contextlib
+import io
+import os
+from metadata import MetadataIndex, parse_front_matter, read_metadata, split_front_matter, skip_front_matter
+from main import generate_page
+from temp_tree import TempTreeTestCase
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_parse_front_matter(self):
+        lines = ["title: \"Hello: world\"", "# a comment", "", "draft: false", "weight: 3", "tags: [elves, 'rings']"]
+        self.assertEqual(parse_front_matter(lines), {"title": "Hello: world", "draft": False, "weight": 3, "tags": ["elves", "rings"]})
+        with self.assertRaises(ValueError):
+            parse_front_matter(["no separator"])
+
+    def test_split_front_matter(self):
+        self.assertEqual(split_front_matter("---\ntitle: A\n---\n# Heading\n\ntext"), ({"title": "A"}, "# Heading\n\ntext"))
+        self.assertEqual(split_front_matter("# Heading\n\n---"), ({}, "# Heading\n\n---"))
+        # A leading --- rule, not closed or not followed by key: value lines, is markdown
+        for markdown in ("---\n\n# Title\n\nbody", "---\ntitle: A\n# Heading", "---\n\n# Title\n\nbody\n\n---\n\nmore"):
+            self.assertEqual(split_front_matter(markdown), ({}, markdown))
+
+    def test_skip_front_matter(self):
+        self.assertEqual(list(skip_front_matter(["---\n", "a: 1\n", "---\n", "# Heading\n"])), ["# Heading\n"])
+        self.assertEqual(list(skip_front_matter(["# Heading\n", "text\n"])), ["# Heading\n", "text\n"])
+        self.assertEqual(list(skip_front_matter([])), [])
+        self.assertEqual(list(skip_front_matter(["---\n", "\n", "# Title\n", "body\n"])), ["---\n", "\n", "# Title\n", "body\n"])
+
+
+class TestMetadata(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+
+    def write(self, name, text):
+        return super().write(os.path.join(self.content, name), text)
+
+    def test_read_metadata(self):
+        self.assertEqual(read_metadata(self.write("a.md", "intro\n\n## First heading\n\n# Second")), {"title": "First heading"})
+        self.assertEqual(read_metadata(self.write("b.md", "---\ntitle: From front matter\ndate: 2024-01-02\n---\n# Heading")), {"title": "From front matter", "date": "2024-01-02"})
+        self.assertEqual(read_metadata(self.write("c.md", "---\ndraft: true\n---\n# Heading")), {"draft": True, "title": "Heading"})
+        self.assertEqual(read_metadata(self.write("d.md", "no heading")), {"title": None})
+        self.assertEqual(read_metadata(self.write("e.md", "---\n\n# Title\n\nbody")), {"title": "Title"})
+
+    def test_read_metadata_stops_at_the_title(self):
+        # Bytes that aren't utf-8 far past the title would fail if the whole file was decoded
+        path = os.path.join(self.content, "big.md")
+        os.makedirs(self.content)
+        with open(path, "wb") as file:
+            file.write(b"# Title\n" + b"more text\n" * 100000 + b"\xff\xfe")
+        self.assertEqual(read_metadata(path), {"title": "Title"})
+
+    def test_index_refresh_and_query(self):
+        self.write("index.md", "# Home")
+        old = self.write(os.path.join("blog", "old.md"), "---\ndate: 2023-05-01\n---\n# Old post")
+        new = self.write(os.path.join("blog", "new.md"), "---\ndate: 2024-05-01\n---\n# New post")
+        self.write(os.path.join("blog", "draft.md"), "---\ndraft: true\n---\n# Draft")
+        path = os.path.join(self.root, ".build", "metadata.json")
+
+        index = MetadataIndex(path)
+        self.assertEqual(index.refresh(self.content), 4)
+        index.save()
+        index = MetadataIndex.load(path)
+        self.assertEqual(index.refresh(self.content), 0)
+
+        posts = index.query(under=os.path.join(self.content, "blog"), sort_by="date", reverse=True)
+        self.assertEqual([source for source, metadata in posts][:2], [new, old])
+        self.assertEqual(len(posts), 3)
+        self.assertEqual([metadata["title"] for source, metadata in index.query(draft=True)], ["Draft"])
+
+        os.unlink(old)
+        self.write(os.path.join("blog", "new.md"), "---\ndate: 2024-05-01\n---\n# New post, edited")
+        self.assertEqual(index.refresh(self.content), 1)
+        self.assertNotIn(old, index.pages)
+        self.assertEqual(index.pages[new]["metadata"]["title"], "New post, edited")
+
+    def test_pages_render_without_front_matter(self):
+        template = super().write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        source = self.write("page.md", "---\ntitle: Custom title\n---\n# Heading\n\ntext")
+        for stream_threshold in (1 << 20, 0):
+            dest = os.path.join(self.root, f"page{stream_threshold}.html")
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_page(source, template, dest, "/", stream_threshold=stream_threshold)
+            with open(dest) as file:
+                self.assertEqual(file.read(), "<title>Custom title</title><div><h1>Heading</h1><p>text</p></div>")
+
+
+    def test_pages_starting_with_a_rule_render(self):
+        template = super().write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        source = self.write("page.md", "---\n\n# Title\n\nbody")
+        for stream_threshold in (1 << 20, 0):
+            dest = os.path.join(self.root, f"page{stream_threshold}.html")
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_page(source, template, dest, "/", stream_threshold=stream_threshold)
+            with open(dest) as file:
+                self.assertEqual(file.read(), "<title>Title</title><div><p>---</p><h1>Title</h1><p>body</p></div>")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import contextlib
+import io
+import os
+from manifest import BuildManifest, hash_bytes
+from output_writer import OutputWriter, write_output_if_changed
+from main import generate_pages_recursively
+from temp_tree import TempTreeTestCase
+
+
+class TestOutputWriter(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.root, "out", "index.html")
+
+    def age(self, path):
+        os.utime(path, ns=(0, 0))
+
+    def test_skips_unchanged_content(self):
+        self.assertTrue(write_output_if_changed(self.path, "<p>one</p>").changed)
+        self.age(self.path)
+        file = write_output_if_changed(self.path, "<p>one</p>")
+        self.assertFalse(file.changed)
+        self.assertEqual(file.digest, hash_bytes(b"<p>one</p>"))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+        self.assertTrue(write_output_if_changed(self.path, "<p>two</p>").changed)
+        with open(self.path) as out:
+            self.assertEqual(out.read(), "<p>two</p>")
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["index.html"])
+
+    def test_trusts_previous_hash(self):
+        write_output_if_changed(self.path, "<p>one</p>")
+        # Same size, the recorded hash decides without reading the file
+        self.assertTrue(write_output_if_changed(self.path, "<p>one</p>", previous_hash="0" * 64).changed)
+        self.age(self.path)
+        self.assertFalse(write_output_if_changed(self.path, "<p>one</p>", previous_hash=hash_bytes(b"<p>one</p>")).changed)
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+
+    def test_failure_keeps_previous_output(self):
+        write_output_if_changed(self.path, "<p>one</p>")
+        with self.assertRaises(ValueError):
+            with OutputWriter(self.path) as file:
+                file.writelines(["<p>half", " a page"])
+                raise ValueError("render failed")
+        with open(self.path) as out:
+            self.assertEqual(out.read(), "<p>one</p>")
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["index.html"])
+
+    def test_build_leaves_unchanged_pages_alone(self):
+        content = os.path.join(self.root, "content")
+        template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(content, "index.md"), "# Home\n\ntext")
+        dest = os.path.join(self.root, "docs")
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+
+        def build():
+            results = {}
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursively(content, template, dest, "/", manifest, on_result=results.__setitem__)
+            return results
+
+        output = os.path.join(dest, "index.html")
+        self.assertTrue(build()[os.path.join(content, "index.md")]["changed"])
+        self.assertEqual(manifest.pages[os.path.join(content, "index.md")]["output_hash"], hash_bytes(b"<title>Home</title><div><h1>Home</h1><p>text</p></div>"))
+        self.age(output)
+        # Trailing blank lines change the source but not the page
+        with open(os.path.join(content, "index.md"), "a") as file:
+            file.write("\n\n")
+        self.assertFalse(build()[os.path.join(content, "index.md")]["changed"])
+        self.assertEqual(os.stat(output).st_mtime_ns, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+import io
 from htmlnode import *
 
 
@@ -47,6 +48,33 @@ class TestParentNode(unittest.TestCase):
             node.to_html(),
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
         )
+
+    def test_deep_nesting_does_not_recurse(self):
+        node = LeafNode("b", "deep")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * 5000 + "<b>deep</b>"))
+        self.assertTrue(html.endswith("</span>" * 5000))
+
+    def test_write_html_matches_to_html(self):
+        node = ParentNode("ul", [
+            ParentNode("li", [LeafNode(None, "one"), LeafNode("a", "two", {"href": "/x"})]),
+            ParentNode("li", [], {"class": "empty"}),
+        ])
+        out = io.StringIO()
+        node.write_html(out)
+        self.assertEqual(out.getvalue(), node.to_html())
+        self.assertEqual("".join(node.iter_html()), node.to_html())
+
+    def test_invalid_child_raises(self):
+        node = ParentNode("div", [ParentNode(None, [LeafNode(None, "x")])])
+        with self.assertRaises(ValueError):
+            node.to_html()
+        node = ParentNode("div", [ParentNode("p", None)])
+        with self.assertRaises(ValueError):
+            node.to_html()
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
     
\ No newline at end of file
@@ -0,0 +1,79 @@
+import unittest
+import gzip
+import os
+import time
+from manifest import BuildManifest
+from deploy_report import DeployReport
+from precompress import precompress_outputs, remove_precompressed, compression_formats, compress_bytes
+from temp_tree import TempTreeTestCase
+
+
+class TestPrecompress(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+        self.page = self.write("index.html", "<p>hello</p>" * 100)
+        self.css = self.write("index.css", "body {}")
+        self.image = self.write(os.path.join("images", "a.png"), "png")
+        self.manifest.pages["content/index.md"] = {"output": self.page}
+        self.manifest.static = {"index.css": self.css, os.path.join("images", "a.png"): self.image}
+
+    def test_writes_compressed_siblings(self):
+        self.assertEqual(precompress_outputs(self.root, self.manifest, jobs=2), {"compressed": 2, "unchanged": 0, "removed": 0})
+        with gzip.open(self.page + ".gz", "rt") as file:
+            self.assertEqual(file.read(), "<p>hello</p>" * 100)
+        self.assertFalse(os.path.exists(self.image + ".gz"))
+        self.assertEqual(os.stat(self.page + ".gz").st_mtime_ns, os.stat(self.page).st_mtime_ns)
+        self.assertEqual(os.path.exists(self.page + ".br"), ".br" in compression_formats())
+
+    def test_skips_current_files(self):
+        precompress_outputs(self.root, self.manifest)
+        self.assertEqual(precompress_outputs(self.root, self.manifest)["unchanged"], 2)
+        self.write("index.css", "body { margin: 0 }")
+        os.utime(self.css, ns=(time.time_ns(), time.time_ns() + 1000))
+        self.assertEqual(precompress_outputs(self.root, self.manifest)["compressed"], 1)
+        with gzip.open(self.css + ".gz", "rt") as file:
+            self.assertEqual(file.read(), "body { margin: 0 }")
+
+        # A compressed file deleted by hand is written again
+        os.unlink(self.page + ".gz")
+        self.assertEqual(precompress_outputs(self.root, self.manifest)["compressed"], 1)
+
+    def test_touched_files_are_not_reported(self):
+        precompress_outputs(self.root, self.manifest)
+        os.utime(self.css, ns=(time.time_ns(), time.time_ns() + 1000))
+        self.write("index.html", "<p>changed</p>" * 100)
+        report = DeployReport(self.root)
+        self.assertEqual(precompress_outputs(self.root, self.manifest, report=report)["compressed"], 2)
+        self.assertEqual(sorted(report.modified), sorted("index.html" + compression_format for compression_format in compression_formats()))
+        self.assertEqual(os.stat(self.css + ".gz").st_mtime_ns, os.stat(self.css).st_mtime_ns)
+
+    def test_removes_siblings_of_deleted_outputs(self):
+        precompress_outputs(self.root, self.manifest)
+        os.unlink(self.page)
+        del self.manifest.pages["content/index.md"]
+        self.assertEqual(precompress_outputs(self.root, self.manifest)["removed"], 1)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+
+    def test_other_spelling_of_output_dir_keeps_siblings(self):
+        precompress_outputs(self.root, self.manifest)
+        self.manifest.pages["content/index.md"] = {"output": os.path.relpath(self.page)}
+        self.assertEqual(precompress_outputs(self.root, self.manifest)["removed"], 0)
+        self.assertTrue(os.path.exists(self.page + ".gz"))
+
+    def test_remove_precompressed(self):
+        precompress_outputs(self.root, self.manifest)
+        self.assertEqual(remove_precompressed(self.root, self.manifest), 2)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+        self.assertFalse(os.path.exists(self.css + ".gz"))
+        self.assertTrue(os.path.exists(self.page))
+        self.assertEqual(self.manifest.compressed, {})
+
+    def test_gzip_is_reproducible(self):
+        self.assertEqual(compress_bytes(b"same input", ".gz"), compress_bytes(b"same input", ".gz"))
+        with self.assertRaises(ValueError):
+            compress_bytes(b"data", ".zip")
+
+
+if __name__ == "__main__":
+    unittest.main()
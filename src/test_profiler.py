@@ -0,0 +1,75 @@
+import unittest
+import contextlib
+import io
+import json
+import os
+import tempfile
+from profiler import Profiler, NullProfiler
+from main import generate_page_safely
+from template import Template
+
+
+class TestProfiler(unittest.TestCase):
+    def test_stage_records(self):
+        profiler = Profiler()
+        with profiler.stage("a.md", "parse"):
+            [object() for _ in range(100)]
+        with profiler.stage(None, "static"):
+            pass
+        self.assertEqual([record["stage"] for record in profiler.records], ["parse", "static"])
+        self.assertEqual(profiler.records[0]["page"], "a.md")
+        self.assertGreaterEqual(profiler.records[0]["duration"], 0)
+        self.assertEqual(list(profiler.page_totals()), ["a.md"])
+
+    def test_stage_records_on_error(self):
+        profiler = Profiler()
+        with self.assertRaises(ValueError):
+            with profiler.stage("a.md", "parse"):
+                raise ValueError("broken")
+        self.assertEqual(len(profiler.records), 1)
+
+    def test_summary_orders_slowest_first(self):
+        profiler = Profiler()
+        profiler.merge([
+            {"page": "fast.md", "stage": "read", "start": 0.0, "duration": 0.001, "allocations": 1, "pid": 1},
+            {"page": "slow.md", "stage": "parse", "start": 0.0, "duration": 0.5, "allocations": 10, "pid": 1},
+        ])
+        summary = profiler.summary()
+        self.assertLess(summary.index("parse"), summary.index("read"))
+        self.assertLess(summary.index("slow.md"), summary.index("fast.md"))
+        self.assertEqual(profiler.stage_totals()["parse"]["allocations"], 10)
+
+    def test_write_trace(self):
+        profiler = Profiler()
+        with profiler.stage("a.md", "read"):
+            pass
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "trace.json")
+            profiler.write_trace(path)
+            with open(path) as file:
+                events = json.load(file)["traceEvents"]
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]["ph"], "X")
+        self.assertEqual(events[0]["args"]["page"], "a.md")
+
+    def test_null_profiler(self):
+        profiler = NullProfiler()
+        with profiler.stage("a.md", "read"):
+            pass
+        self.assertFalse(profiler.enabled)
+        self.assertEqual(profiler.records, [])
+
+    def test_page_result_carries_profile(self):
+        with tempfile.TemporaryDirectory() as root:
+            source = os.path.join(root, "index.md")
+            with open(source, "w") as file:
+                file.write("# Home\n\nhello")
+            template = Template("<title>{{ Title }}</title>{{ Content }}")
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = generate_page_safely(source, template, os.path.join(root, "index.html"), "/", {"profile": True})
+        self.assertIsNone(result["error"])
+        self.assertEqual([record["stage"] for record in result["profile"]], ["read", "parse", "render", "write"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import json
+import os
+import tempfile
+from render_cache import BlockRenderCache, cached_markdown_to_html_node, cache_summary
+from block_markdown import markdown_to_html_node
+from template import rebase_node_urls
+
+
+class TestBlockRenderCache(unittest.TestCase):
+    def test_hits_and_misses(self):
+        cache = BlockRenderCache()
+        key = cache.key("some text", "/")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "<p>some text</p>")
+        self.assertEqual(cache.get(key), "<p>some text</p>")
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1, "evictions": 0})
+
+    def test_evicts_least_recently_used(self):
+        cache = BlockRenderCache(max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertEqual(cache.evictions, 1)
+
+    def test_key_includes_base_path(self):
+        self.assertNotEqual(BlockRenderCache.key("[a](/b)", "/"), BlockRenderCache.key("[a](/b)", "/site/"))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache", "blocks.json")
+            cache = BlockRenderCache(path=path)
+            cache.put("a", "<p>a</p>")
+            self.assertEqual(cache.drain_new_entries(), {"a": "<p>a</p>"})
+            self.assertEqual(cache.drain_new_entries(), {})
+            cache.save()
+
+            loaded = BlockRenderCache(path=path)
+            loaded.load()
+            self.assertEqual(loaded.get("a"), "<p>a</p>")
+
+            # A file saved by a different parser or renderer is ignored
+            with open(path) as file:
+                data = json.load(file)
+            data["version"] = 1
+            with open(path, "w") as file:
+                json.dump(data, file)
+            outdated = BlockRenderCache(path=path)
+            outdated.load()
+            self.assertEqual(len(outdated.entries), 0)
+
+    def test_load_ignores_corrupt_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "blocks.json")
+            with open(path, "w") as file:
+                file.write("{not json")
+            cache = BlockRenderCache(path=path)
+            cache.load()
+            self.assertEqual(len(cache.entries), 0)
+
+    def test_summary(self):
+        self.assertEqual(
+            cache_summary({"hits": 3, "misses": 1, "evictions": 0}, 1),
+            "Block cache: 3 hits, 1 misses (75.0% hit rate), 0 evictions, 1 entries",
+        )
+
+
+class TestCachedMarkdownToHtmlNode(unittest.TestCase):
+    def test_same_html_as_uncached(self):
+        markdown = "# Title\n\nSome **bold** and a [link](/blog)\n\n- one\n- two\n\n```\ncode\n```\n\n> quote"
+        expected = markdown_to_html_node(markdown)
+        rebase_node_urls(expected, "/site/")
+
+        cache = BlockRenderCache()
+        transform = lambda node: rebase_node_urls(node, "/site/")
+        first = cached_markdown_to_html_node(markdown, cache, "/site/", transform)
+        second = cached_markdown_to_html_node(markdown, cache, "/site/", transform)
+        self.assertEqual(first.to_html(), expected.to_html())
+        self.assertEqual(second.to_html(), expected.to_html())
+        self.assertEqual(cache.hits, 5)
+
+    def test_shared_blocks_rendered_once(self):
+        cache = BlockRenderCache()
+        cached_markdown_to_html_node("# One\n\nShared footer", cache, "/")
+        cached_markdown_to_html_node("# Two\n\nShared footer", cache, "/")
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 3, "evictions": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
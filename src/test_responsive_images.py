@@ -0,0 +1,110 @@
+import unittest
+import contextlib
+import io
+import os
+import struct
+import zlib
+from responsive_images import ImagePipeline, image_size, set_image_attributes, variant_name, Image
+from htmlnode import LeafNode, ParentNode
+from template import rebase_node_urls
+from main import generate_page
+from temp_tree import TempTreeTestCase
+
+
+def png_bytes(width, height):
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    ihdr = struct.pack(">I", len(header)) + b"IHDR" + header + struct.pack(">I", zlib.crc32(b"IHDR" + header))
+    row = b"\x00" + b"\x80\x40\x20" * width
+    data = zlib.compress(row * height)
+    idat = struct.pack(">I", len(data)) + b"IDAT" + data + struct.pack(">I", zlib.crc32(b"IDAT" + data))
+    iend = struct.pack(">I", 0) + b"IEND" + struct.pack(">I", zlib.crc32(b"IEND"))
+    return b"\x89PNG\r\n\x1a\n" + ihdr + idat + iend
+
+
+class TestImageSize(TempTreeTestCase):
+    def size_of(self, data):
+        path = os.path.join(self.root, "image")
+        with open(path, "wb") as file:
+            file.write(data)
+        return image_size(path)
+
+    def test_formats(self):
+        self.assertEqual(self.size_of(png_bytes(30, 20)), (30, 20))
+        self.assertEqual(self.size_of(b"GIF89a" + struct.pack("<HH", 640, 480) + b"\x00" * 20), (640, 480))
+        jpeg = b"\xff\xd8" + b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9 + b"\xff\xc0" + struct.pack(">HBHH", 17, 8, 600, 800) + b"\x00" * 10
+        self.assertEqual(self.size_of(jpeg), (800, 600))
+        vp8x = b"RIFF" + b"\x00" * 4 + b"WEBP" + b"VP8X" + b"\x00" * 8 + (1023).to_bytes(3, "little") + (767).to_bytes(3, "little")
+        self.assertEqual(self.size_of(vp8x), (1024, 768))
+        self.assertIsNone(self.size_of(b"not an image at all"))
+
+    def test_variant_name(self):
+        self.assertEqual(variant_name(os.path.join("images", "elf.png"), 480), os.path.join("images", "elf-480w.png"))
+
+
+class TestImagePipeline(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.output = os.path.join(self.root, "docs")
+        self.cache = os.path.join(self.root, "cache")
+        os.makedirs(os.path.join(self.static, "images"))
+        with open(os.path.join(self.static, "images", "wide.png"), "wb") as file:
+            file.write(png_bytes(1000, 500))
+        self.write(os.path.join(self.static, "images", "notes.txt"), "not an image")
+
+    def pipeline(self):
+        pipeline = ImagePipeline(self.static, self.output, self.cache, (400, 800, 1600))
+        pipeline.load()
+        pipeline.run()
+        pipeline.save()
+        return pipeline
+
+    def test_measures_images(self):
+        attributes = self.pipeline().attributes()
+        self.assertEqual(attributes["widths"], [400, 800, 1600])
+        image = attributes["attributes"]["/images/wide.png"]
+        self.assertEqual((image["width"], image["height"]), (1000, 500))
+        self.assertEqual(image["variants"], [400, 800] if Image is not None else [])
+        self.assertEqual(self.pipeline().attributes(), attributes)
+
+    @unittest.skipIf(Image is None, "Pillow is not installed")
+    def test_writes_variants(self):
+        self.pipeline()
+        with Image.open(os.path.join(self.output, "images", "wide-400w.png")) as variant:
+            self.assertEqual(variant.size, (400, 200))
+        os.unlink(os.path.join(self.static, "images", "wide.png"))
+        self.pipeline()
+        self.assertFalse(os.path.exists(os.path.join(self.output, "images", "wide-400w.png")))
+
+    def test_set_image_attributes(self):
+        images = {"attributes": {
+            "/images/a.png": {"width": 1000, "height": 500, "variants": [480]},
+            "/images/b.png": {"width": 300, "height": 200, "variants": []},
+        }}
+        a = LeafNode("img", "", {"src": "/images/a.png", "alt": "a"})
+        b = LeafNode("img", "", {"src": "/images/b.png", "alt": "b"})
+        other = LeafNode("img", "", {"src": "https://example.com/c.png", "alt": "c"})
+        node = set_image_attributes(ParentNode("div", [ParentNode("p", [a, b, other])]), images)
+        self.assertEqual(a.props["srcset"], "/images/a-480w.png 480w, /images/a.png 1000w")
+        rebase_node_urls(node, "/site/")
+        self.assertEqual(a.props["srcset"], "/site/images/a-480w.png 480w, /site/images/a.png 1000w")
+        self.assertEqual(a.props["sizes"], "(max-width: 1000px) 100vw, 1000px")
+        self.assertEqual(b.to_html(), '<img src="/site/images/b.png" alt="b" width="300" height="200" loading="lazy"></img>')
+        self.assertEqual(other.props, {"src": "https://example.com/c.png", "alt": "c"})
+
+    def test_generate_page_with_images(self):
+        images = self.pipeline().attributes()
+        template = self.write("template.html", "{{ Title }}{{ Content }}")
+        source = self.write("page.md", "# Page\n\n![wide](/images/wide.png)")
+        for stream_threshold in (1 << 20, 0):
+            dest = os.path.join(self.root, f"page{stream_threshold}.html")
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_page(source, template, dest, "/site/", stream_threshold=stream_threshold, images=images)
+            with open(dest) as file:
+                html = file.read()
+            self.assertIn('src="/site/images/wide.png"', html)
+            self.assertIn('width="1000" height="500" loading="lazy"', html)
+
+
+if __name__ == "__main__":
+    unittest.main()
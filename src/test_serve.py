@@ -0,0 +1,92 @@
+import unittest
+import contextlib
+import io
+import os
+from manifest import BuildManifest
+from serve import Watcher, SiteRebuilder, is_within
+from temp_tree import TempTreeTestCase
+
+
+class TestServe(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nwelcome")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog\n\nposts")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.rebuilder = SiteRebuilder(
+            self.content, self.static, self.template, self.docs, "/",
+            BuildManifest(os.path.join(self.root, ".build", "manifest.json")),
+        )
+        self.run_quietly(self.rebuilder.build)
+
+    def read(self, path):
+        with open(path) as file:
+            return file.read()
+
+    def run_quietly(self, function, *args):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            function(*args)
+        return output.getvalue()
+
+    def test_watcher_reports_changes(self):
+        watcher = Watcher([self.content, self.template])
+        self.assertEqual(watcher.poll(), ([], []))
+        page = os.path.join(self.content, "index.md")
+        self.write(page, "# Home\n\nchanged and longer")
+        new_page = os.path.join(self.content, "new.md")
+        self.write(new_page, "# New")
+        os.unlink(os.path.join(self.content, "blog", "index.md"))
+        changed, removed = watcher.poll()
+        self.assertEqual(changed, sorted([page, new_page]))
+        self.assertEqual(removed, [os.path.join(self.content, "blog", "index.md")])
+
+    def test_markdown_change_renders_one_page(self):
+        page = os.path.join(self.content, "index.md")
+        self.write(page, "# Home\n\nchanged")
+        output = self.run_quietly(self.rebuilder.apply, [page], [])
+        self.assertEqual(output.count("Generating page"), 1)
+        self.assertIn("<p>changed</p>", self.read(os.path.join(self.docs, "index.html")))
+
+    def test_static_change_copies_one_file(self):
+        css = os.path.join(self.static, "index.css")
+        self.write(css, "body { color: red }")
+        output = self.run_quietly(self.rebuilder.apply, [css], [])
+        self.assertNotIn("Generating page", output)
+        self.assertEqual(self.read(os.path.join(self.docs, "index.css")), "body { color: red }")
+
+    def test_template_change_renders_every_page(self):
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        output = self.run_quietly(self.rebuilder.apply, [self.template], [])
+        self.assertEqual(output.count("Generating page"), 2)
+        self.assertTrue(self.read(os.path.join(self.docs, "index.html")).startswith("<h1>Home</h1>"))
+
+    def test_removed_files(self):
+        page = os.path.join(self.content, "blog", "index.md")
+        css = os.path.join(self.static, "index.css")
+        os.unlink(page)
+        os.unlink(css)
+        self.run_quietly(self.rebuilder.apply, [], [page, css])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.css")))
+        self.assertNotIn(page, self.rebuilder.manifest.pages)
+
+    def test_broken_page_keeps_serving(self):
+        page = os.path.join(self.content, "index.md")
+        self.write(page, "no heading")
+        output = self.run_quietly(self.rebuilder.apply, [page], [])
+        self.assertIn("Failed to generate", output)
+        self.assertNotIn(page, self.rebuilder.manifest.pages)
+
+    def test_is_within(self):
+        self.assertTrue(is_within(os.path.join(self.content, "a.md"), self.content))
+        self.assertFalse(is_within(self.content + "-other/a.md", self.content))
+
+
+if __name__ == "__main__":
+    unittest.main()
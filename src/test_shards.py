@@ -0,0 +1,126 @@
+import unittest
+import argparse
+import contextlib
+import io
+import os
+import subprocess
+from main import generate_pages_recursively, parse_shard, shard_of, SHARD_BUILD_DIR
+from manifest import BuildManifest
+from dependency_graph import DependencyGraph
+from shards import merge_shards, build_shards_locally
+from temp_tree import TempTreeTestCase
+
+
+TEMPLATE = '<title>{{ Title }}</title><link href="/index.css" /><article>{{ Content }}</article>'
+
+
+class TestShardPartition(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for text in ("0/4", "5/4", "1/0", "a/b", "3"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_shard(text)
+
+    def test_every_page_lands_in_exactly_one_shard(self):
+        paths = [os.path.join("blog", f"post{i}", "index.md") for i in range(200)]
+        shards = [shard_of(path, 4) for path in paths]
+        self.assertEqual(set(shards), {1, 2, 3, 4})
+        self.assertEqual(shards, [shard_of(path, 4) for path in paths])
+        self.assertEqual(shard_of("blog/post1/index.md", 4), shard_of(os.path.join("blog", "post1", "index.md"), 4))
+
+
+class TestShardedBuild(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        for i in range(12):
+            self.write(os.path.join(self.content, f"page{i}", "index.md"), f"# Page {i}\n\n[next](/page{i + 1})")
+
+    def read_tree(self, root):
+        files = {}
+        for dirpath, dirnames, names in os.walk(root):
+            dirnames[:] = [name for name in dirnames if name != SHARD_BUILD_DIR]
+            for name in names:
+                path = os.path.join(dirpath, name)
+                with open(path, "rb") as file:
+                    files[os.path.relpath(path, root)] = file.read()
+        return files
+
+    def build_shard(self, index, count):
+        shard_dir = os.path.join(self.root, "shards", str(index))
+        manifest = BuildManifest(os.path.join(shard_dir, SHARD_BUILD_DIR, "manifest.json"))
+        graph = DependencyGraph(os.path.join(shard_dir, SHARD_BUILD_DIR, "graph.json"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursively(self.content, self.template, shard_dir, "/site/", manifest, graph=graph, shard=(index, count))
+        manifest.save()
+        graph.save()
+        return shard_dir
+
+    def merge(self, shard_dirs, manifest, graph=None):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return merge_shards(shard_dirs, self.content, os.path.join(self.root, "docs"), manifest, graph)
+
+    def test_merged_shards_match_a_single_build(self):
+        single = os.path.join(self.root, "single")
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursively(self.content, self.template, single, "/site/")
+
+        shard_dirs = [self.build_shard(index, 3) for index in (1, 2, 3)]
+        self.assertEqual(sum(len(self.read_tree(shard_dir)) for shard_dir in shard_dirs), 12)
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+        graph = DependencyGraph(os.path.join(self.root, "graph.json"))
+        self.assertEqual(self.merge(shard_dirs, manifest, graph), {"copied": 12, "unchanged": 0, "removed": 0})
+        self.assertEqual(self.read_tree(os.path.join(self.root, "docs")), self.read_tree(single))
+        self.assertEqual(len(manifest.pages), 12)
+        self.assertEqual(len(graph.pages), 12)
+        self.assertTrue(all(entry["output"].startswith(os.path.join(self.root, "docs")) for entry in manifest.pages.values()))
+
+        # Merging again copies nothing, and a page deleted since is removed from the output
+        self.assertEqual(self.merge(shard_dirs, manifest)["unchanged"], 12)
+        os.unlink(os.path.join(self.content, "page0", "index.md"))
+        shard_dirs = [self.build_shard(index, 3) for index in (1, 2, 3)]
+        self.assertEqual(self.merge(shard_dirs, manifest)["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "docs", "page0")))
+
+    def test_overlapping_shards_are_rejected(self):
+        shard_dir = self.build_shard(1, 1)
+        with self.assertRaises(ValueError):
+            self.merge([shard_dir, shard_dir], BuildManifest(os.path.join(self.root, "manifest.json")))
+
+    def test_incomplete_splits_are_rejected(self):
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+        shard_dirs = [self.build_shard(index, 3) for index in (1, 2, 3)]
+        self.merge(shard_dirs, manifest)
+        for given in (shard_dirs[:2], shard_dirs[:2] + [self.build_shard(3, 4)], shard_dirs + [self.content]):
+            with self.assertRaises(ValueError):
+                self.merge(given, manifest)
+        self.assertEqual(len(self.read_tree(os.path.join(self.root, "docs"))), 12)
+
+    def test_pages_whose_source_exists_are_kept(self):
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+        shard_dirs = [self.build_shard(1, 1)]
+        self.merge(shard_dirs, manifest)
+        # A shard that, for whatever reason, didn't render a page still on disk
+        source = os.path.join(self.content, "page0", "index.md")
+        shard_manifest = BuildManifest.load(os.path.join(shard_dirs[0], SHARD_BUILD_DIR, "manifest.json"))
+        del shard_manifest.pages[source]
+        shard_manifest.save()
+        self.assertEqual(self.merge(shard_dirs, manifest)["removed"], 0)
+        self.assertTrue(os.path.exists(os.path.join(self.root, "docs", "page0", "index.html")))
+        self.assertIn(source, manifest.pages)
+
+    def test_local_processes(self):
+        build_args = ["/site/", "--content", self.content, "--template", self.template, "--jobs", "1"]
+        shard_dirs = build_shards_locally(2, os.path.join(self.root, "shards"), build_args, subprocess.DEVNULL)
+        self.assertEqual(sum(len(self.read_tree(shard_dir)) for shard_dir in shard_dirs), 12)
+        for shard_dir in shard_dirs:
+            self.assertTrue(os.path.exists(os.path.join(shard_dir, SHARD_BUILD_DIR, "manifest.json")))
+            self.assertFalse(os.path.exists(os.path.join(shard_dir, "index.css")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import contextlib
+import io
+import os
+from manifest import BuildManifest
+from deploy_report import DeployReport
+from static_sync import sync_static, place_file, file_is_current
+from temp_tree import TempTreeTestCase
+
+
+class TestStaticSync(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.docs = os.path.join(self.root, "docs")
+        self.manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+
+    def sync(self, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return sync_static(self.static, self.docs, self.manifest, **kwargs)
+
+    def test_copies_only_changed_files(self):
+        self.assertEqual(self.sync(), {"copied": 2, "unchanged": 0, "removed": 0})
+        self.assertEqual(self.sync(), {"copied": 0, "unchanged": 2, "removed": 0})
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        self.assertEqual(self.sync(), {"copied": 1, "unchanged": 1, "removed": 0})
+        with open(os.path.join(self.docs, "index.css")) as file:
+            self.assertEqual(file.read(), "body { margin: 0 }")
+
+    def test_removes_stale_files_but_not_pages(self):
+        self.sync()
+        self.write(os.path.join(self.docs, "index.html"), "<p>page</p>")
+        os.unlink(os.path.join(self.static, "images", "a.png"))
+        self.assertEqual(self.sync()["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+        self.assertEqual(list(self.manifest.static), ["index.css"])
+
+    def test_other_spelling_of_output_dir_keeps_files(self):
+        self.sync()
+        with contextlib.redirect_stdout(io.StringIO()):
+            counts = sync_static(self.static, os.path.relpath(self.docs), self.manifest)
+        self.assertEqual(counts["removed"], 0)
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.css")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "images", "a.png")))
+
+    def test_reports_changed_files(self):
+        self.sync()
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        os.unlink(os.path.join(self.static, "images", "a.png"))
+        changed = set()
+        self.sync(changed=changed)
+        self.assertEqual(changed, {"index.css", os.path.join("images", "a.png")})
+
+    def test_checksum_skips_touched_files(self):
+        self.sync()
+        source = os.path.join(self.static, "index.css")
+        os.utime(source, ns=(0, 0))
+        self.assertEqual(self.sync(checksum=True)["copied"], 0)
+        self.assertTrue(file_is_current(source, os.path.join(self.docs, "index.css")))
+        os.utime(source, ns=(1, 1))
+        self.assertEqual(self.sync()["copied"], 1)
+
+    def test_touched_files_are_not_reported_modified(self):
+        self.sync()
+        os.utime(os.path.join(self.static, "index.css"), ns=(0, 0))
+        self.write(os.path.join(self.static, "images", "a.png"), "new png")
+        report = DeployReport(self.docs)
+        changed = set()
+        self.assertEqual(self.sync(report=report, changed=changed)["copied"], 2)
+        self.assertEqual(list(report.modified), ["images/a.png"])
+        self.assertEqual(changed, {os.path.join("images", "a.png")})
+
+    def test_hardlink(self):
+        self.sync(link_mode="hardlink")
+        source = os.path.join(self.static, "index.css")
+        self.assertTrue(os.path.samefile(source, os.path.join(self.docs, "index.css")))
+
+    def test_reflink_falls_back_to_copy(self):
+        destination = os.path.join(self.docs, "copy.css")
+        used = place_file(os.path.join(self.static, "index.css"), destination, "reflink")
+        self.assertIn(used, ("reflink", "copy"))
+        with open(destination) as file:
+            self.assertEqual(file.read(), "body {}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import io
+from template import Template, rebase_url, rebase_node_urls, minify_html
+from htmlnode import LeafNode, ParentNode
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile_splits_slots(self):
+        template = Template("<title>{{ Title }}</title><article>{{Content}}</article>")
+        self.assertEqual(template.slots, ["Title", "Content"])
+        self.assertEqual(template.literals, ["<title>", "</title><article>", "</article>"])
+
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title><article>{{ Content }}</article>")
+        self.assertEqual(
+            template.render(Title="Home", Content="<p>hi</p>"),
+            "<title>Home</title><article><p>hi</p></article>",
+        )
+
+    def test_write_streams_nodes(self):
+        template = Template("<title>{{ Title }}</title><article>{{ Content }}</article>")
+        node = ParentNode("div", [LeafNode("p", "hi")])
+        out = io.StringIO()
+        template.write(out, Title="Home", Content=node)
+        self.assertEqual(out.getvalue(), "<title>Home</title><article><div><p>hi</p></div></article>")
+        self.assertEqual(template.render(Title="Home", Content=node), out.getvalue())
+
+    def test_render_leaves_unknown_slots(self):
+        template = Template("{{ Title }} {{ Author }}")
+        self.assertEqual(template.render(Title="Home"), "Home {{ Author }}")
+
+    def test_base_path_applied_at_compile_time(self):
+        template = Template('<link href="/index.css" /><img src="/a.png" />{{ Content }}', "/site/")
+        self.assertEqual(
+            template.render(Content='<a href="/x">x</a>'),
+            '<link href="/site/index.css" /><img src="/site/a.png" /><a href="/x">x</a>',
+        )
+
+    def test_digest_tracks_source(self):
+        self.assertEqual(Template("a").digest, Template("a", "/site/").digest)
+        self.assertNotEqual(Template("a").digest, Template("b").digest)
+
+    def test_rebase_url(self):
+        self.assertEqual(rebase_url("/images/a.png", "/site/"), "/site/images/a.png")
+        self.assertEqual(rebase_url("https://example.com", "/site/"), "https://example.com")
+
+    def test_rebase_node_urls(self):
+        node = ParentNode("p", [
+            LeafNode("a", "home", {"href": "/blog"}),
+            LeafNode("img", "", {"src": "/images/a.png", "alt": "a"}),
+            LeafNode(None, 'text with href="/kept"'),
+        ])
+        rebase_node_urls(node, "/site/")
+        self.assertEqual(
+            node.to_html(),
+            '<p><a href="/site/blog">home</a><img src="/site/images/a.png" alt="a"></img>text with href="/kept"</p>',
+        )
+
+
+    def test_minify_html(self):
+        source = (
+            "<!doctype html>\n<html>\n  <head>\n    <!-- a comment -->\n    <title>{{ Title }}</title>\n  </head>\n"
+            "  <body>\n    <p>two   words</p>\n    <pre>  keep\n    this  </pre>\n    <!--[if IE]>kept<![endif]-->\n  </body>\n</html>\n"
+        )
+        self.assertEqual(
+            minify_html(source),
+            "<!doctype html><html><head><title>{{ Title }}</title></head><body><p>two words</p>"
+            "<pre>  keep\n    this  </pre><!--[if IE]>kept<![endif]--></body></html>",
+        )
+
+    def test_minify_keeps_spaces_between_inline_elements(self):
+        self.assertEqual(minify_html("<b>hello</b>\n  <i>world</i>"), "<b>hello</b> <i>world</i>")
+        self.assertEqual(
+            minify_html("<nav>\n  <a href=\"/\">home</a>\n  <a href=\"/blog\">blog</a>\n</nav>\n<span>x</span>\n<pre> y </pre>"),
+            '<nav><a href="/">home</a> <a href="/blog">blog</a></nav><span>x</span><pre> y </pre>',
+        )
+
+    def test_minified_template_leaves_content_alone(self):
+        template = Template("<html>\n  <body>\n    <article>{{ Content }}</article>\n  </body>\n</html>\n", minify=True)
+        code = ParentNode("pre", [LeafNode("code", "line one\n    line two\n")])
+        self.assertEqual(template.render(Content=code), "<html><body><article><pre><code>line one\n    line two\n</code></pre></article></body></html>")
+        self.assertNotEqual(template.digest, Template("<html>\n  <body>\n    <article>{{ Content }}</article>\n  </body>\n</html>\n").digest)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -41,6 +41,17 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
         self.assertEqual(html_node.tag, "b")
         self.assertEqual(html_node.value, "This is bold")
 
+    def test_link(self):
+        node = TextNode("click", TextType.LINK, "/blog")
+        self.assertEqual(text_node_to_html_node(node).to_html(), '<a href="/blog">click</a>')
+
+    def test_invalid_text_type(self):
+        with self.assertRaises(ValueError):
+            text_node_to_html_node(TextNode("x", "underline"))
+
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(TextNode("x", TextType.TEXT), "__dict__"))
+
 if __name__ == "__main__":
     unittest.main()
     
\ No newline at end of file
@@ -15,6 +15,8 @@ class TextNode():
     """
     represents the various types of inline text that can exist in HTML and Markdown.
     """
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text: str, text_type: TextType, url: str = None) -> None:
         self.text = text
         self.text_type = text_type
@@ -32,17 +34,22 @@ class TextNode():
         return f"TextNode({self.text!r}, {self.text_type}, {self.url!r})"
 
 
+# Tag for each text type, looked up once instead of walking a chain of comparisons
+TEXT_TYPE_TAGS = {
+    TextType.TEXT: None,
+    TextType.BOLD: "b",
+    TextType.ITALIC: "i",
+    TextType.CODE: "code",
+    TextType.LINK: "a",
+    TextType.IMAGE: "img",
+}
+
 def text_node_to_html_node(text_node: TextNode) -> LeafNode:
-    if text_node.text_type == TextType.TEXT:
-            return LeafNode(None, text_node.text)
-    if text_node.text_type == TextType.BOLD:
-        return LeafNode("b", text_node.text)
-    if text_node.text_type == TextType.ITALIC:
-        return LeafNode("i", text_node.text)
-    if text_node.text_type == TextType.CODE:
-        return LeafNode("code", text_node.text)
+    if text_node.text_type not in TEXT_TYPE_TAGS:
+        raise ValueError(f"invalid text type: {text_node.text_type}")
+    tag = TEXT_TYPE_TAGS[text_node.text_type]
     if text_node.text_type == TextType.LINK:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
+        return LeafNode(tag, text_node.text, {"href": text_node.url})
     if text_node.text_type == TextType.IMAGE:
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
-    raise ValueError(f"invalid text type: {text_node.text_type}")
+        return LeafNode(tag, "", {"src": text_node.url, "alt": text_node.text})
+    return LeafNode(tag, text_node.text)